@@ -1,19 +1,27 @@
-import subprocess
 import sys
 
 sys.dont_write_bytecode = True
 
 import os
 import json
+import mmap
 import time
+from enum import Enum
 from pathlib import Path
-from threading import Thread, Event, Lock
+from threading import Thread, Event, Lock, Condition
 from typing import Dict, Any, Optional
 
-from flask import Flask, jsonify, render_template, request
-from pydantic import BaseModel, ValidationError
+import psutil
+from flask import Flask, g, render_template, request
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from pydantic import BaseModel, TypeAdapter, ValidationError
 
-from bot.core import setup_logging
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from bot.core import CAPTCHA_STATE, main as bot_main, setup_logging
 
 app_logger = setup_logging()
 
@@ -35,6 +43,66 @@ class ConfigSchema(BaseModel):
     parse_all_pages: bool
     quantity_unit: str
     parse_depth: str
+    workers: Annotated[int, Field(ge=1)] = 1
+    headless: bool = False
+
+
+_VALIDATOR = ConfigSchema.__pydantic_validator__
+_SERIALIZER = ConfigSchema.__pydantic_serializer__
+_FIELD_ADAPTERS = {
+    name: TypeAdapter(
+        Annotated[(field.annotation, *field.metadata)]
+        if field.metadata
+        else field.annotation
+    )
+    for name, field in ConfigSchema.model_fields.items()
+}
+
+
+MMAP_THRESHOLD = 4096
+
+
+def read_json(path: Path, size: int = 0) -> Any:
+    if orjson is None:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    if size < MMAP_THRESHOLD:
+        return orjson.loads(path.read_bytes())
+
+    with open(path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mapped:
+        with memoryview(mapped) as view:
+            return orjson.loads(view)
+
+
+def freeze_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in config.items()
+    }
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    ensure_ascii = False
+    compact = True
+
+
+class OrjsonProvider(JSONProvider):
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+class BotState(Enum):
+    STOPPED = "stopped"
+    STARTING = "starting"
+    RUNNING = "running"
+    STOPPING = "stopping"
 
 
 class BotController:
@@ -44,23 +112,13 @@ class BotController:
         self.stop_event = Event()
         self.lock = Lock()
         self.config_path = Path("bot/config.json")
-        self.is_stopping = False
-        self.is_starting = False
+        self._state = BotState.STOPPED
         self.last_result: Optional[bool] = None
         self.last_error: Optional[str] = None
+        self._config_cache: Optional[tuple[int, int, Dict[str, Any]]] = None
 
-    def get_bot_state(self) -> str:
-        if self.bot_is_running():
-            return "running"
-        if self.is_stopping:
-            return "stopping"
-        return "stopped"
-
-    def get_last_result(self) -> Optional[bool]:
-        return self.last_result
-
-    def get_last_error(self) -> Optional[str]:
-        return self.last_error
+    def snapshot(self) -> tuple[str, Optional[bool], Optional[str]]:
+        return self._state.value, self.last_result, self.last_error
 
     def clear_errors(self) -> None:
         self.last_error = None
@@ -80,44 +138,52 @@ class BotController:
             "parse_all_pages": False,
             "quantity_unit": "Kilograms",
             "parse_depth": "level1",
+            "workers": 1,
+            "headless": False,
         }
 
         try:
-            if not self.config_path.exists():
+            try:
+                stat = self.config_path.stat()
+            except FileNotFoundError:
                 app_logger.warning(
                     "Конфиг не найден, создаём новый с дефолтными значениями"
                 )
                 self.save_config(default_config)
                 return default_config
 
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                loaded_config = json.load(f)
-                config = default_config.copy()
-                needs_update = False
+            cache_key = (stat.st_mtime_ns, stat.st_size)
+            if self._config_cache is not None and self._config_cache[:2] == cache_key:
+                return self._config_cache[2].copy()
 
-                for key in default_config:
-                    if key not in loaded_config:
-                        needs_update = True
-                        continue
+            loaded_config = read_json(self.config_path, stat.st_size)
 
-                    try:
-                        temp_config = default_config.copy()
-                        temp_config[key] = loaded_config[key]
-
-                        ConfigSchema(**temp_config)
-
-                        config[key] = loaded_config[key]
-                    except ValidationError as e:
-                        app_logger.warning(
-                            f"Невалидное значение для {key}, исправляем на значение по умолчанию: {str(e)}"
-                        )
-                        needs_update = True
+            try:
+                config = freeze_config(
+                    _SERIALIZER.to_python(_VALIDATOR.validate_python(loaded_config))
+                )
+                self._config_cache = (*cache_key, config)
+                return config.copy()
+            except ValidationError:
+                app_logger.warning("Конфиг не прошёл проверку, проверяем поля")
+
+            config = default_config.copy()
+            for key in default_config:
+                if key not in loaded_config:
+                    continue
+                try:
+                    config[key] = _FIELD_ADAPTERS[key].validate_python(
+                        loaded_config[key]
+                    )
+                except ValidationError as e:
+                    app_logger.warning(
+                        f"Невалидное значение для {key}, исправляем на значение по умолчанию: {str(e)}"
+                    )
 
-                if needs_update:
-                    app_logger.info("Обновляем конфиг файл с исправленными значениями")
-                    self.save_config(config)
+            app_logger.info("Обновляем конфиг файл с исправленными значениями")
+            self.save_config(config)
 
-                return config
+            return config
 
         except json.JSONDecodeError as e:
             app_logger.error(f"Ошибка чтения JSON: {str(e)}")
@@ -130,9 +196,14 @@ class BotController:
 
     def save_config(self, config: Dict[str, Any]) -> bool:
         try:
-            validated = ConfigSchema(**config).model_dump()
-            with open(self.config_path, "w", encoding="utf-8") as f:
-                json.dump(validated, f, indent=2, ensure_ascii=False)
+            model = _VALIDATOR.validate_python(config)
+            self.config_path.write_bytes(_SERIALIZER.to_json(model, indent=2))
+            stat = self.config_path.stat()
+            self._config_cache = (
+                stat.st_mtime_ns,
+                stat.st_size,
+                freeze_config(_SERIALIZER.to_python(model)),
+            )
             app_logger.info("Конфигурация успешно сохранена")
             return True
         except (ValidationError, TypeError) as e:
@@ -142,129 +213,130 @@ class BotController:
             app_logger.error(f"Ошибка сохранения: {str(e)}", exc_info=True)
             return False
 
+    def _compare_exchange(self, expected: BotState, new: BotState) -> bool:
+        with self.lock:
+            if self._state is not expected:
+                return False
+            self._state = new
+            return True
+
     def bot_is_running(self) -> bool:
-        app_logger.debug("Checking bot status...")
+        bot_thread = self.bot_thread
         return (
-            self.bot_thread is not None
-            and self.bot_thread.is_alive()
-            and not self.is_stopping
+            self._state is BotState.RUNNING
+            and bot_thread is not None
+            and bot_thread.is_alive()
         )
 
     def start_bot(self) -> bool:
-        if self.bot_is_running():
-            app_logger.warning("Bot is already running")
+        if not self._compare_exchange(BotState.STOPPED, BotState.STARTING):
+            app_logger.warning(f"Cannot start bot in state: {self._state.value}")
             return False
 
         self.clear_errors()
 
-        with self.lock:
-            if self.is_starting:
-                app_logger.warning("Start already in progress")
-                return False
-
-            try:
-                app_logger.info("Attempting to start bot...")
-                self.is_starting = True
-                self.stop_event.clear()
-                initialization_event = Event()
+        try:
+            app_logger.info("Attempting to start bot...")
+            self.stop_event.clear()
+            initialized = Condition(self.lock)
+            started = False
 
+            def bot_wrapper() -> None:
+                nonlocal started
                 try:
-                    from bot.core import main as bot_main
-
-                    app_logger.info("Bot module imported successfully")
-                except ImportError as e:
-                    app_logger.critical(f"Failed to import bot module: {str(e)}")
+                    with initialized:
+                        started = True
+                        if self._state is BotState.STARTING:
+                            self._state = BotState.RUNNING
+                        initialized.notify_all()
+                    app_logger.info("Bot initialization started")
+                    self.last_result = bot_main(self.stop_event)
+                    if self.last_result:
+                        app_logger.info("Bot completed successfully")
+                        self.last_error = None
+                    else:
+                        app_logger.error("Bot completed with errors")
+                        self.last_error = "Ошибка выполнения бота"
+                except Exception as e:
+                    app_logger.error(f"Bot thread error: {str(e)}", exc_info=True)
+                    self.last_result = False
+                    self.last_error = f"{type(e).__name__}: {str(e)}"
+                finally:
                     self._cleanup()
-                    return False
 
-                def bot_wrapper() -> None:
-                    try:
-                        initialization_event.set()
-                        app_logger.info("Bot initialization started")
-                        self.last_result = bot_main(self.stop_event)
-                        if self.last_result:
-                            app_logger.info("Bot completed successfully")
-                            self.last_error = None
-                        else:
-                            app_logger.error("Bot completed with errors")
-                            self.last_error = "Ошибка выполнения бота"
-                    except Exception as e:
-                        app_logger.error(f"Bot thread error: {str(e)}", exc_info=True)
-                        self.last_result = False
-                        self.last_error = f"{type(e).__name__}: {str(e)}"
-                    finally:
-                        self._cleanup()
-
-                self.bot_thread = Thread(target=bot_wrapper, daemon=True)
-                self.bot_thread.start()
-
-                if not initialization_event.wait(timeout=3.0):
+            self.bot_thread = Thread(target=bot_wrapper, daemon=True)
+            self.bot_thread.start()
+
+            with initialized:
+                if not initialized.wait_for(lambda: started, timeout=3.0):
                     app_logger.error("Bot initialization timeout")
                     self._cleanup()
                     return False
 
-                app_logger.info("Bot started successfully")
-                return True
+            app_logger.info("Bot started successfully")
+            return True
 
-            except Exception as e:
-                app_logger.error(f"Error starting bot: {str(e)}", exc_info=True)
-                return False
-            finally:
-                if not self.bot_is_running():
-                    self.is_starting = False
-                    self._cleanup()
+        except Exception as e:
+            app_logger.error(f"Error starting bot: {str(e)}", exc_info=True)
+            self._cleanup()
+            return False
 
     def stop_bot(self) -> bool:
-        with self.lock:
-            app_logger.info("Attempting to stop bot...")
+        app_logger.info("Attempting to stop bot...")
 
-            if self.is_stopping:
+        with self.lock:
+            if self._state is BotState.STOPPING:
                 app_logger.warning("Stop already in progress")
                 return True
+            self._state = BotState.STOPPING
 
-            try:
-                interval = 1
-                attempts = 60
+        try:
+            timeout = 60.0
 
-                self.is_stopping = True
-                app_logger.info("Setting stop event...")
-                self.stop_event.set()
+            app_logger.info("Setting stop event...")
+            self.stop_event.set()
 
-                app_logger.debug(
-                    f"Stop parameters: interval={interval}s, attempts={attempts}"
-                )
+            app_logger.debug(f"Stop parameters: timeout={timeout}s")
 
-                for i in range(attempts):
-                    if self.bot_thread is None or not self.bot_thread.is_alive():
-                        app_logger.info("Bot thread finished successfully")
-                        self._cleanup()
-                        return True
+            bot_thread = self.bot_thread
+            if bot_thread is not None:
+                app_logger.info("Waiting for bot to stop...")
+                bot_thread.join(timeout=timeout)
 
-                    app_logger.info(f"Waiting for bot to stop... {i + 1}/{attempts}")
-                    time.sleep(interval)
+            if bot_thread is None or not bot_thread.is_alive():
+                app_logger.info("Bot thread finished successfully")
+                return True
 
-                app_logger.error("Bot failed to stop within timeout")
-                return False
+            app_logger.error("Bot failed to stop within timeout")
+            return False
 
-            except Exception as e:
-                app_logger.error(f"Error stopping bot: {str(e)}", exc_info=True)
-                return False
-            finally:
-                self._cleanup()
+        except Exception as e:
+            app_logger.error(f"Error stopping bot: {str(e)}", exc_info=True)
+            return False
+        finally:
+            self._cleanup()
 
     def _cleanup(self) -> None:
         self.bot_thread = None
         self.stop_event.clear()
-        self.is_stopping = False
-        self.is_starting = False
+        self._state = BotState.STOPPED
         app_logger.info("Bot state cleaned up")
 
 
 app = Flask("app")
-app.secret_key = os.urandom(24)
+app.json = OrjsonProvider(app) if orjson is not None else CompactJSONProvider(app)
 controller = BotController()
 
 
+EXPECTED_ERRORS = (ValidationError, json.JSONDecodeError)
+
+
+def request_timestamp() -> str:
+    if "ts" not in g:
+        g.ts = time.ctime()
+    return g.ts
+
+
 @app.route("/api/config", methods=["GET"])
 def get_config() -> Dict[str, Any]:
     try:
@@ -287,7 +359,7 @@ def update_config() -> Dict[str, str]:
         return {"status": "error", "message": "Invalid configuration"}, 400
 
     except Exception as e:
-        app_logger.error(f"Ошибка обновления конфига: {str(e)}", exc_info=True)
+        app_logger.error(f"Ошибка обновления конфига: {str(e)}")
         return {"status": "error", "message": str(e)}, 500
 
 
@@ -298,54 +370,46 @@ def start_bot() -> Dict[str, str]:
 
         if controller.bot_is_running():
             return (
-                jsonify(
-                    {
-                        "status": "error",
-                        "message": "Бот уже запущен",
-                        "state": "running",
-                        "timestamp": time.ctime(),
-                    }
-                ),
+                {
+                    "status": "error",
+                    "message": "Бот уже запущен",
+                    "state": "running",
+                    "timestamp": request_timestamp(),
+                },
                 409,
             )
 
         start_result = controller.start_bot()
 
         if start_result:
-            return jsonify(
-                {
-                    "status": "success",
-                    "message": "Бот успешно запущен",
-                    "state": "starting",
-                    "timestamp": time.ctime(),
-                }
-            )
+            return {
+                "status": "success",
+                "message": "Бот успешно запущен",
+                "state": "starting",
+                "timestamp": request_timestamp(),
+            }
 
         return (
-            jsonify(
-                {
-                    "status": "error",
-                    "message": "Не удалось запустить бота",
-                    "state": "stopped",
-                    "timestamp": time.ctime(),
-                }
-            ),
+            {
+                "status": "error",
+                "message": "Не удалось запустить бота",
+                "state": "stopped",
+                "timestamp": request_timestamp(),
+            },
             500,
         )
 
     except Exception as e:
         error_msg = f"Ошибка запуска бота: {str(e)}"
-        app_logger.error(error_msg, exc_info=True)
+        app_logger.error(error_msg, exc_info=not isinstance(e, EXPECTED_ERRORS))
         return (
-            jsonify(
-                {
-                    "status": "error",
-                    "message": error_msg,
-                    "details": str(e),
-                    "state": "error",
-                    "timestamp": time.ctime(),
-                }
-            ),
+            {
+                "status": "error",
+                "message": error_msg,
+                "details": str(e),
+                "state": "error",
+                "timestamp": request_timestamp(),
+            },
             500,
         )
 
@@ -356,96 +420,89 @@ def stop_bot() -> Dict[str, str]:
         app_logger.info("Received stop bot request")
 
         if not controller.bot_is_running():
-            return jsonify(
-                {
-                    "status": "success",
-                    "message": "Бот не запущен",
-                    "state": "stopped",
-                    "timestamp": time.ctime(),
-                }
-            )
+            return {
+                "status": "success",
+                "message": "Бот не запущен",
+                "state": "stopped",
+                "timestamp": request_timestamp(),
+            }
 
         stop_result = controller.stop_bot()
 
         if stop_result:
-            return jsonify(
-                {
-                    "status": "success",
-                    "message": "Запрос на остановку бота отправлен",
-                    "state": "stopping",
-                    "timestamp": time.ctime(),
-                }
-            )
+            return {
+                "status": "success",
+                "message": "Запрос на остановку бота отправлен",
+                "state": "stopping",
+                "timestamp": request_timestamp(),
+            }
 
         return (
-            jsonify(
-                {
-                    "status": "error",
-                    "message": "Не удалось отправить запрос на остановку",
-                    "state": "running",
-                    "timestamp": time.ctime(),
-                }
-            ),
+            {
+                "status": "error",
+                "message": "Не удалось отправить запрос на остановку",
+                "state": "running",
+                "timestamp": request_timestamp(),
+            },
             500,
         )
 
     except Exception as e:
         error_msg = f"Ошибка остановки бота: {str(e)}"
-        app_logger.error(error_msg, exc_info=True)
+        app_logger.error(error_msg, exc_info=not isinstance(e, EXPECTED_ERRORS))
         return (
-            jsonify(
-                {
-                    "status": "error",
-                    "message": error_msg,
-                    "details": str(e),
-                    "state": "unknown",
-                    "timestamp": time.ctime(),
-                }
-            ),
+            {
+                "status": "error",
+                "message": error_msg,
+                "details": str(e),
+                "state": "unknown",
+                "timestamp": request_timestamp(),
+            },
             500,
         )
 
 
 @app.route("/api/bot/status", methods=["GET"])
 def bot_status() -> Dict[str, str]:
-    status_info = {
-        "state": controller.get_bot_state(),
-        "last_result": controller.get_last_result(),
-        "error": controller.get_last_error(),
-        "timestamp": time.ctime(),
+    state, last_result, error = controller.snapshot()
+    return {
+        "state": state,
+        "last_result": last_result,
+        "error": error,
+        "timestamp": request_timestamp(),
     }
-    return jsonify(status_info)
 
 
 @app.route("/api/server/status", methods=["GET"])
 def server_status() -> Dict[str, str]:
-    return jsonify({"status": "running", "timestamp": time.ctime()})
+    return {"status": "running", "timestamp": request_timestamp()}
 
 
 @app.route("/api/bot/captcha-status", methods=["GET"])
 def check_captcha_status() -> Dict[str, str]:
-    from bot.core import CAPTCHA_STATE
+    active, message = CAPTCHA_STATE.snapshot
+    if active:
+        return {"status": "waiting", "message": message}
+    return {"status": "none", "message": "Капча не требуется"}
 
-    if CAPTCHA_STATE["active"]:
-        return jsonify({"status": "waiting", "message": CAPTCHA_STATE["message"]})
-    return jsonify({"status": "none", "message": "Капча не требуется"})
+
+INDEX_HTML: Optional[str] = None
+if getattr(sys, "frozen", False):
+    INDEX_HTML = (Path(sys._MEIPASS) / "templates" / "index.html").read_text(
+        encoding="utf-8"
+    )
 
 
 @app.route("/")
 def index():
-    if getattr(sys, "frozen", False):
-        template_folder = os.path.join(sys._MEIPASS, "templates")
-        template_path = os.path.join(template_folder, "index.html")
-        with open(template_path, "r", encoding="utf-8") as f:
-            template_content = f.read()
-        return template_content
-    else:
-        return render_template("index.html")
+    if INDEX_HTML is not None:
+        return INDEX_HTML, 200, {"Content-Type": "text/html; charset=utf-8"}
+    return render_template("index.html")
 
 
 @app.route("/favicon.ico")
-def favicon() -> tuple[str, int]:
-    return "", 204
+def favicon() -> tuple[str, int, Dict[str, str]]:
+    return "", 204, {"Cache-Control": "public, max-age=31536000"}
 
 
 @app.errorhandler(404)
@@ -457,7 +514,7 @@ def handle_not_found(e) -> Dict[str, str]:
 @app.route("/api/bot/clear-errors", methods=["POST"])
 def clear_errors() -> Dict[str, str]:
     controller.clear_errors()
-    return jsonify({"status": "success"})
+    return {"status": "success"}
 
 
 @app.errorhandler(500)
@@ -482,38 +539,32 @@ if __name__ == "__main__":
             app_logger.error("Port 5000 is already in use!")
             if sys.platform == "win32":
                 try:
-                    netstat_result = subprocess.run(
-                        ["netstat", "-ano"],
-                        capture_output=True,
-                        text=True,
-                        shell=True,
-                    )
-
-                    pids = set()
-                    for line in netstat_result.stdout.splitlines():
-                        if ":5000" in line and "LISTENING" in line:
-                            parts = line.strip().split()
-                            pid = parts[-1]
-                            pids.add(pid)
+                    pids = {
+                        conn.pid
+                        for conn in psutil.net_connections(kind="tcp")
+                        if conn.laddr
+                        and conn.laddr.port == 5000
+                        and conn.status == psutil.CONN_LISTEN
+                        and conn.pid
+                    }
 
                     for pid in pids:
                         try:
-                            subprocess.run(
-                                ["taskkill", "/F", "/PID", pid],
-                                capture_output=True,
-                                shell=True,
-                                timeout=5,
-                            )
-                            app_logger.debug(f"Killed process with PID: {pid}\n")
-                        except subprocess.TimeoutExpired:
-                            app_logger.error(f"Timeout killing PID {pid}\n")
-                            sys.exit(1)
+                            process = psutil.Process(pid)
+                            process.kill()
+                            process.wait(timeout=5)
+                            app_logger.debug(f"Killed process with PID: {pid}")
+                        except psutil.NoSuchProcess:
+                            app_logger.debug(f"Process {pid} already exited")
+                        except psutil.AccessDenied:
+                            app_logger.error(f"Access denied killing PID {pid}")
+                        except psutil.TimeoutExpired:
+                            app_logger.error(f"Timeout killing PID {pid}")
                         except Exception as e:
-                            app_logger.error(f"Error killing PID {pid}: {e}\n")
-                            sys.exit(1)
+                            app_logger.error(f"Error killing PID {pid}: {e}")
 
                 except Exception as e:
-                    app_logger.error(f"Process check error: {e}\n")
+                    app_logger.error(f"Process check error: {e}")
                     sys.exit(1)
 
         app_logger.info("Checking configuration...")
@@ -522,7 +573,12 @@ if __name__ == "__main__":
         app_logger.debug(f"Python version: {sys.version}")
 
         app_logger.info("Starting server on http://localhost:5000")
-        app.run(host="localhost", port=5000, debug=False, use_reloader=False)
+        if os.environ.get("FLASK_DEBUG"):
+            app.run(host="localhost", port=5000, debug=False, use_reloader=False)
+        else:
+            from waitress import serve
+
+            serve(app, host="localhost", port=5000, threads=8)
     except Exception as e:
         app_logger.critical(f"Server startup failed: {str(e)}", exc_info=True)
         sys.exit(1)
@@ -4,33 +4,39 @@ sys.dont_write_bytecode = True
 
 import os
 import re
+import csv
+import atexit
+import shutil
 import json
+import hashlib
 import time
-import glob
+import queue
 import logging
+import reprlib
 import traceback
-import pandas as pd
 from pathlib import Path
-from threading import Event
+from threading import Event, Lock, get_ident
+from typing import Optional
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import (
-    WebDriverException,
-    TimeoutException,
-    NoSuchElementException,
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import (
+    MemoryHandler,
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
 )
-from selenium.webdriver.common.action_chains import ActionChains
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from bot.log_retention import prune_old_logs
 
 
 def setup_logging() -> logging.Logger:
     logs_dir = os.path.join("bot", "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    os.makedirs(logs_dir, exist_ok=True)
 
     MAX_LOG_FILES = 6
     MAX_BYTES = 1024 * 1024
@@ -38,19 +44,9 @@ def setup_logging() -> logging.Logger:
     current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     log_file = os.path.join(logs_dir, f"log_{current_time}.log")
 
-    log_files = []
-    for pattern in ["log_*.log", "log_*.log.*"]:
-        log_files.extend(glob.glob(os.path.join(logs_dir, pattern)))
-
-    log_files = sorted(log_files, key=os.path.getctime)
-
-    while len(log_files) >= MAX_LOG_FILES:
-        try:
-            oldest_file = log_files.pop(0)
-            os.remove(oldest_file)
-            print(f"Удален старый лог файл: {oldest_file}")
-        except Exception as e:
-            print(f"Ошибка при удалении старого лог файла {oldest_file}: {e}")
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
     for lib in ["selenium", "urllib3", "webdriver", "WDM"]:
         logging.getLogger(lib).setLevel(logging.ERROR)
@@ -71,16 +67,29 @@ def setup_logging() -> logging.Logger:
     file_handler.setFormatter(formatter)
     file_handler.setLevel(logging.DEBUG)
 
+    buffered_handler = MemoryHandler(
+        capacity=512, flushLevel=logging.ERROR, target=file_handler
+    )
+    atexit.register(buffered_handler.flush)
+
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
     console_handler.setLevel(logging.DEBUG)
 
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(
+        log_queue, buffered_handler, console_handler, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
     app_logger.handlers.clear()
-    app_logger.addHandler(file_handler)
-    app_logger.addHandler(console_handler)
+    app_logger.addHandler(QueueHandler(log_queue))
 
     app_logger.propagate = False
 
+    prune_old_logs(logs_dir, MAX_LOG_FILES)
+
     return app_logger
 
 
@@ -98,8 +107,45 @@ DEFAULT_FREEZE_HEADER = True
 DEFAULT_PARSE_ALL_PAGES = False
 DEFAULT_QUANTITY_UNIT = "Kilograms"
 DEFAULT_PARSE_DEPTH = "level1"
+DEFAULT_WORKERS = 1
+DEFAULT_HEADLESS = False
+
+
+class _CaptchaState:
+    __slots__ = ("_messages", "_lock")
+
+    def __init__(self) -> None:
+        self._messages = {}
+        self._lock = Lock()
+
+    @property
+    def snapshot(self) -> tuple[bool, Optional[str]]:
+        with self._lock:
+            for message in self._messages.values():
+                return True, message
+        return False, None
+
+    def set(self, message: str) -> None:
+        with self._lock:
+            self._messages[get_ident()] = message
 
-CAPTCHA_STATE = {"active": False, "message": None}
+    def clear(self) -> None:
+        with self._lock:
+            self._messages.pop(get_ident(), None)
+
+
+CAPTCHA_STATE = _CaptchaState()
+
+
+CONFIG_REPR = reprlib.Repr()
+CONFIG_REPR.maxdict = 32
+CONFIG_REPR.maxlist = 8
+CONFIG_REPR.maxstring = 80
+
+MAX_VALIDATED_CONFIGS = 16
+VALIDATED_CONFIG_FILES = {}
+
+IDLE_DRIVERS = {}
 
 WEIGHT_UNITS = {
     "Kilograms": 1.0,
@@ -119,17 +165,80 @@ WEIGHT_UNITS = {
     "mt": 1000.0,
 }
 
+PRODUCT_SELECT_ID = "ctl00_NavigationControl_DropDownList_Product"
+COUNTRY_SELECT_ID = "ctl00_NavigationControl_DropDownList_Country"
+COUNTRY_RADIO_ID = "ctl00_NavigationControl_RadioButton_Country"
+TEXT_EXPORT_BUTTON_ID = "ctl00_PageContent_GridViewPanelControl_ImageButton_Text"
+PREVIOUS_BUTTON_ID = "ctl00_PageContent_GridViewPanelControl_ImageButton_Previous"
+LOGIN_BUTTON_ID = "ctl00_MenuControl_marmenu_login"
+
+PRODUCT_SELECT_LOCATOR = ("id", PRODUCT_SELECT_ID)
+COUNTRY_SELECT_LOCATOR = ("id", COUNTRY_SELECT_ID)
+COUNTRY_RADIO_LOCATOR = ("id", COUNTRY_RADIO_ID)
+TEXT_EXPORT_BUTTON_LOCATOR = ("id", TEXT_EXPORT_BUTTON_ID)
+PREVIOUS_BUTTON_LOCATOR = ("id", PREVIOUS_BUTTON_ID)
+
+INVALID_LOGIN_XPATH = "//*[text()[contains(., 'Invalid username or password')]]"
+
+CODE_STEP_STOPS = (2, 4, 6, 10)
+
+CHROME_BINARIES = (
+    "google-chrome",
+    "google-chrome-stable",
+    "chromium",
+    "chromium-browser",
+)
+HEADLESS_CHROME_ARGUMENTS = (
+    "--headless=new",
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-extensions",
+    "--blink-settings=imagesEnabled=false",
+)
+
+CHROME_APP_PATH_KEY = r"SOFTWARE\Microsoft\Windows\CurrentVersion\App Paths\chrome.exe"
+
+WEIGHT_UNIT_NAMES = tuple(sorted(WEIGHT_UNITS, key=len, reverse=True))
+
+_DATE_RE = re.compile(r"^(\d{4}-M\d{2})")
+_PERIOD_RE = re.compile(r"SetValues\('prev','(\d+)'\)")
+_UNIT_RE = re.compile(
+    r",\s*(" + "|".join(map(re.escape, WEIGHT_UNIT_NAMES)) + r")\s*$"
+)
+
 
 def validate_product_code(code: str) -> bool:
-    app_logger.debug(f"Проверка кода продукта: {code}")
-    is_valid = len(str(code)) >= 0 and str(code).isdigit()
-    if not is_valid:
-        app_logger.warning(f"Неверный формат кода продукта: {code}")
-    return is_valid
+    code = code if isinstance(code, str) else str(code)
+    if code.isdigit():
+        return True
+    app_logger.warning("Неверный формат кода продукта: %s", code)
+    return False
+
+
+def _chrome_registered() -> bool:
+    if sys.platform == "win32":
+        import winreg
+
+        for root in (winreg.HKEY_LOCAL_MACHINE, winreg.HKEY_CURRENT_USER):
+            try:
+                winreg.OpenKey(root, CHROME_APP_PATH_KEY).Close()
+                return True
+            except OSError:
+                pass
+        return False
+    return any(shutil.which(name) for name in CHROME_BINARIES)
 
 
 def check_chrome_installed() -> bool:
     app_logger.debug("Проверка установки Chrome")
+    if _chrome_registered():
+        app_logger.info("Chrome успешно обнаружен")
+        return True
+
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
+
+    app_logger.debug("Chrome не найден в системе, пробный запуск браузера")
     try:
         driver = webdriver.Chrome()
         driver.quit()
@@ -142,9 +251,8 @@ def check_chrome_installed() -> bool:
 
 def validate_config(config: dict) -> bool:
     app_logger.debug("Начало проверки конфигурации")
-    app_logger.debug(
-        f"Полученный конфиг: {json.dumps(config, ensure_ascii=False, indent=2)}"
-    )
+    if app_logger.isEnabledFor(logging.DEBUG):
+        app_logger.debug("Полученный конфиг: %s", CONFIG_REPR.repr(config))
 
     required_fields = {
         "username": "логин",
@@ -158,7 +266,7 @@ def validate_config(config: dict) -> bool:
             error_msg = f"В конфиге отсутствует или пустое поле '{name}'"
             app_logger.error(error_msg)
             return False
-        app_logger.debug(f"Поле '{name}' присутствует и не пустое")
+        app_logger.debug("Поле '%s' присутствует и не пустое", name)
 
     if not config["product_codes"] or not config["countries"]:
         error_msg = "Должен быть указан минимум 1 код продукта и 1 страна"
@@ -183,6 +291,10 @@ def validate_config(config: dict) -> bool:
         config["quantity_unit"] = DEFAULT_QUANTITY_UNIT
     if "parse_depth" not in config:
         config["parse_depth"] = DEFAULT_PARSE_DEPTH
+    if "workers" not in config:
+        config["workers"] = DEFAULT_WORKERS
+    if "headless" not in config:
+        config["headless"] = DEFAULT_HEADLESS
 
     if config["quantity_unit"] not in ["Kilograms", "Tons"]:
         error_msg = f"Неверная единица измерения в конфиге: {config['quantity_unit']}. Допустимы только 'Kilograms' или 'Tons'"
@@ -202,6 +314,8 @@ def validate_config(config: dict) -> bool:
         config["download_timeout"] = int(config["download_timeout"])
         config["captcha_timeout"] = int(config["captcha_timeout"])
         config["freeze_header"] = bool(config["freeze_header"])
+        config["workers"] = int(config["workers"])
+        config["headless"] = bool(config["headless"])
 
         if (
             config["action_delay"] <= 0.1
@@ -209,34 +323,187 @@ def validate_config(config: dict) -> bool:
             or config["retry_count"] <= 1
             or config["download_timeout"] <= 5
             or config["captcha_timeout"] <= 30
+            or config["workers"] < 1
         ):
             raise ValueError("Значения задержек и попыток должны быть положительными")
 
-        app_logger.debug(f"Задержка между действиями: {config['action_delay']} сек")
-        app_logger.debug(f"Таймаут ожидания: {config['page_timeout']} сек")
-        app_logger.debug(f"Количество попыток: {config['retry_count']}")
-        app_logger.debug(f"Таймаут загрузки: {config['download_timeout']} сек")
-        app_logger.debug(f"Таймаут капчи: {config['captcha_timeout']} сек")
-        app_logger.debug(f"Закрепление заголовка: {config['freeze_header']}")
-        app_logger.debug(f"Парсинг всех страниц: {config['parse_all_pages']}")
+        app_logger.debug("Задержка между действиями: %s сек", config["action_delay"])
+        app_logger.debug("Таймаут ожидания: %s сек", config["page_timeout"])
+        app_logger.debug("Количество попыток: %s", config["retry_count"])
+        app_logger.debug("Таймаут загрузки: %s сек", config["download_timeout"])
+        app_logger.debug("Таймаут капчи: %s сек", config["captcha_timeout"])
+        app_logger.debug("Закрепление заголовка: %s", config["freeze_header"])
+        app_logger.debug("Парсинг всех страниц: %s", config["parse_all_pages"])
+        app_logger.debug("Количество браузеров: %s", config["workers"])
+        app_logger.debug("Фоновый режим браузера: %s", config["headless"])
 
     except Exception as e:
         error_msg = f"Некорректные значения параметров: {str(e)}"
         app_logger.error(error_msg)
         return False
 
-    app_logger.debug(f"Количество кодов продуктов: {len(config['product_codes'])}")
-    app_logger.debug(f"Коды продуктов: {', '.join(map(str, config['product_codes']))}")
-    app_logger.debug(f"Количество стран: {len(config['countries'])}")
-    app_logger.debug(f"Страны: {', '.join(config['countries'])}")
-    app_logger.debug(f"Единица измерения: {config['quantity_unit']}")
-    app_logger.debug(f"Уровень глубины парсинга: {config['parse_depth']}")
+    app_logger.debug("Количество кодов продуктов: %s", len(config["product_codes"]))
+    if app_logger.isEnabledFor(logging.DEBUG):
+        app_logger.debug(
+            "Коды продуктов: %s", CONFIG_REPR.repr(config["product_codes"])
+        )
+    app_logger.debug("Количество стран: %s", len(config["countries"]))
+    if app_logger.isEnabledFor(logging.DEBUG):
+        app_logger.debug("Страны: %s", CONFIG_REPR.repr(config["countries"]))
+    app_logger.debug("Единица измерения: %s", config["quantity_unit"])
+    app_logger.debug("Уровень глубины парсинга: %s", config["parse_depth"])
 
     app_logger.info("Конфигурация успешно прошла проверку")
     return True
 
 
+def _txt_names(directory: str) -> set[str]:
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries if entry.name.endswith(".txt")}
+
+
+def _wait_for_postback(driver, element, config: dict) -> None:
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+
+    try:
+        WebDriverWait(driver, config["action_delay"], poll_frequency=0.05).until(
+            EC.staleness_of(element)
+        )
+    except TimeoutException:
+        pass
+
+
+def _wait_for_document_ready(driver, config: dict) -> None:
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
+    try:
+        WebDriverWait(driver, config["action_delay"], poll_frequency=0.05).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        pass
+
+
+_OPTION_VALUES_JS = (
+    "var s = document.getElementById(arguments[0]);"
+    "return s ? Array.from(s.options, function (o) {"
+    "return [o.value, o.title || '', o.text || ''];"
+    "}) : [];"
+)
+
+_SELECTED_VALUE_JS = (
+    "var s = document.getElementById(arguments[0]);"
+    "return s ? s.value : null;"
+)
+
+
+def _xpath_literal(text: str) -> str:
+    if '"' not in text:
+        return f'"{text}"'
+    if "'" not in text:
+        return f"'{text}'"
+    parts = text.split('"')
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in parts) + ")"
+
+
+_BULK_SET_JS = (
+    "var changed = null;"
+    "arguments[0].forEach(function (p) {"
+    "var s = document.getElementById(p[0]);"
+    "if (s && s.value !== p[1]) { s.value = p[1]; changed = s; }"
+    "});"
+    "if (changed) { changed.dispatchEvent(new Event('change', {bubbles: true})); }"
+    "return changed !== null;"
+)
+
+_SELECTED_VALUES_JS = (
+    "return arguments[0].map(function (id) {"
+    "var s = document.getElementById(id);"
+    "return s ? s.value : null;"
+    "});"
+)
+
+_PREVIOUS_BUTTON_STATE_JS = (
+    "var b = document.getElementById(arguments[0]);"
+    "return b ? [b.getAttribute('onclick'), b.disabled] : null;"
+)
+
+_CLEAR_STORAGE_JS = (
+    "try { window.localStorage.clear(); window.sessionStorage.clear(); }"
+    "catch (e) {}"
+)
+
+
+def _option_values(driver, element_id: str) -> list[list[str]]:
+    return driver.execute_script(_OPTION_VALUES_JS, element_id)
+
+
+def _bulk_set_dropdowns(driver, wait, parameters: list, config: dict) -> list:
+    from selenium.webdriver.support import expected_conditions as EC
+
+    anchor_locator = ("id", parameters[0][0])
+    try:
+        anchor = wait.until(EC.presence_of_element_located(anchor_locator))
+        pairs = [(param_id, param_value) for param_id, param_value, _ in parameters]
+        if driver.execute_script(_BULK_SET_JS, pairs):
+            _wait_for_postback(driver, anchor, config)
+            wait.until(EC.presence_of_element_located(anchor_locator))
+
+        selected = driver.execute_script(
+            _SELECTED_VALUES_JS, [param_id for param_id, _, _ in parameters]
+        )
+    except Exception as e:
+        app_logger.warning(f"Не удалось установить параметры одним запросом: {str(e)}")
+        return list(parameters)
+
+    pending = [
+        parameter
+        for parameter, value in zip(parameters, selected)
+        if value != parameter[1]
+    ]
+    if pending:
+        app_logger.debug(
+            "Параметры для поочередной установки: %s",
+            ", ".join(p[2] for p in pending),
+        )
+    else:
+        app_logger.info("Основные параметры установлены одним запросом")
+    return pending
+
+
+def _wait_for_selected_value(
+    driver, element_id: str, expected: str, timeout: float
+) -> Optional[str]:
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import JavascriptException, TimeoutException
+
+    observed = None
+
+    def is_selected(d) -> bool:
+        nonlocal observed
+        observed = d.execute_script(_SELECTED_VALUE_JS, element_id)
+        return observed == expected
+
+    try:
+        WebDriverWait(
+            driver,
+            timeout,
+            poll_frequency=0.1,
+            ignored_exceptions=(JavascriptException,),
+        ).until(is_selected)
+    except TimeoutException:
+        pass
+    return observed
+
+
 def handle_captcha(driver, config: dict, stop_event: Event) -> bool:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.common.exceptions import TimeoutException
+
     app_logger.debug("Проверка наличия капчи")
 
     if "stCaptcha.aspx" not in driver.current_url:
@@ -245,74 +512,171 @@ def handle_captcha(driver, config: dict, stop_event: Event) -> bool:
 
     app_logger.info("Обнаружена капча")
     try:
-        CAPTCHA_STATE["active"] = True
-        CAPTCHA_STATE["message"] = "Требуется ввод капчи"
+        CAPTCHA_STATE.set("Требуется ввод капчи")
 
         error_shown = False
         max_wait_time = config["captcha_timeout"]
-        start_time = time.time()
-
-        while "stCaptcha.aspx" in driver.current_url:
-            if time.time() - start_time > max_wait_time:
-                app_logger.error(
-                    f"Превышено время ожидания ввода капчи ({max_wait_time} секунд)"
-                )
-                return False
 
-            if stop_event.is_set():
-                app_logger.warning("Остановка запрошена во время ожидания капчи")
+        def captcha_resolved(d) -> bool:
+            nonlocal error_shown
+            if stop_event.is_set() or "stCaptcha.aspx" not in d.current_url:
                 return True
 
-            app_logger.debug(f"Ожидание ввода капчи")
+            app_logger.debug("Ожидание ввода капчи")
 
-            error_div = driver.find_elements(
-                By.ID, "ctl00_PageContent_div_validationFailed"
-            )
+            error_div = d.find_elements(By.ID, "ctl00_PageContent_div_validationFailed")
 
             if (
                 error_div
                 and "The characters you entered are not valid" in error_div[0].text
             ):
                 if not error_shown:
-                    CAPTCHA_STATE["message"] = "Капча введена неверно, попробуйте снова"
+                    CAPTCHA_STATE.set("Капча введена неверно, попробуйте снова")
                     app_logger.warning("Неверно введена капча")
                     error_shown = True
             else:
                 if error_shown:
-                    CAPTCHA_STATE["message"] = "Требуется ввод капчи"
+                    CAPTCHA_STATE.set("Требуется ввод капчи")
                     error_shown = False
 
-            time.sleep(1)
+            return False
 
-            if "stCaptcha.aspx" not in driver.current_url:
-                app_logger.info("Капча успешно пройдена")
-                break
+        try:
+            WebDriverWait(driver, max_wait_time, poll_frequency=0.5).until(
+                captcha_resolved
+            )
+        except TimeoutException:
+            app_logger.error(
+                f"Превышено время ожидания ввода капчи ({max_wait_time} секунд)"
+            )
+            return False
+
+        if stop_event.is_set():
+            app_logger.warning("Остановка запрошена во время ожидания капчи")
+            return True
+
+        app_logger.info("Капча успешно пройдена")
 
     except Exception as e:
         app_logger.error(f"Ошибка при обработке капчи: {str(e)}", exc_info=True)
         return False
     finally:
-        CAPTCHA_STATE["active"] = False
-        CAPTCHA_STATE["message"] = None
+        CAPTCHA_STATE.clear()
 
     return True
 
 
+def _set_dropdown(
+    driver,
+    wait,
+    param_id: str,
+    param_value: str,
+    param_name: str,
+    config: dict,
+    stop_event: Event,
+) -> bool:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import Select
+    from selenium.webdriver.support import expected_conditions as EC
+
+    attempts = 0
+    while attempts < config["retry_count"]:
+        try:
+            if stop_event.is_set():
+                app_logger.info(f"Прерывание настройки параметра {param_name} по запросу")
+                return False
+
+            app_logger.debug(
+                "Попытка установки параметра %s = %s (попытка %s)",
+                param_name,
+                param_value,
+                attempts + 1,
+            )
+
+            element = wait.until(EC.presence_of_element_located((By.ID, param_id)))
+
+            if app_logger.isEnabledFor(logging.DEBUG):
+                app_logger.debug(
+                    "Доступные значения для %s: %s",
+                    param_name,
+                    ", ".join(
+                        f"{value}:{text}"
+                        for value, _, text in _option_values(driver, param_id)
+                    ),
+                )
+
+            Select(element).select_by_value(param_value)
+            _wait_for_postback(driver, element, config)
+
+            if stop_event.is_set():
+                app_logger.info(f"Остановка после установки параметра {param_name}")
+                return False
+
+            selected_value = _wait_for_selected_value(
+                driver, param_id, param_value, config["page_timeout"]
+            )
+
+            if selected_value == param_value:
+                app_logger.info(
+                    f"Параметр {param_name} успешно установлен в {param_value}"
+                )
+                return True
+
+            raise ValueError(
+                f"Выбрано неверное значение: {selected_value} вместо {param_value}"
+            )
+
+        except Exception as e:
+            attempts += 1
+            app_logger.warning(
+                f"Попытка {attempts}/{config['retry_count']}: Ошибка установки параметра {param_name}\n"
+                f"Тип: {type(e).__name__}\nОписание: {str(e)}"
+            )
+
+            if app_logger.isEnabledFor(logging.DEBUG):
+                try:
+                    element_exists = bool(driver.find_elements(By.ID, param_id))
+                    app_logger.debug(
+                        "Элемент %s присутствует в DOM: %s", param_id, element_exists
+                    )
+                except Exception as e:
+                    app_logger.debug("Ошибка проверки DOM: %s", e, exc_info=True)
+
+            if attempts >= config["retry_count"]:
+                app_logger.error(
+                    f"Неудача после {attempts} попыток для параметра {param_name}"
+                )
+                return False
+
+            time.sleep(config["action_delay"])
+
+    return False
+
+
 def select_parameters(
     driver, wait, product_code: str, country_code: str, config: dict, stop_event: Event
 ) -> bool:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import Select
+    from selenium.webdriver.support import expected_conditions as EC
+
+    retry_count = config["retry_count"]
+    action_delay = config["action_delay"]
+    page_timeout = config["page_timeout"]
+
     try:
         if stop_event.is_set():
             app_logger.info("Остановка запрошена перед выбором параметров")
             return True
 
         app_logger.debug(
-            f"Начало выбора параметров для кода {product_code} и страны {country_code}"
+            "Начало выбора параметров для кода %s и страны %s",
+            product_code,
+            country_code,
         )
-        app_logger.debug(f"Переход на страницу {PRODUCT_URL}")
+        app_logger.debug("Переход на страницу %s", PRODUCT_URL)
         driver.get(PRODUCT_URL)
 
-        time.sleep(config["action_delay"])
         if stop_event.is_set():
             app_logger.info("Остановка запрошена после загрузки страницы")
             return True
@@ -323,38 +687,33 @@ def select_parameters(
         try:
             app_logger.debug("Выбор 'All products' для обновления списка кодов")
             product_select = wait.until(
-                EC.presence_of_element_located(
-                    (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-                )
+                EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
             )
             select = Select(product_select)
             select.select_by_value("TOTAL")
-            time.sleep(config["action_delay"])
+            _wait_for_postback(driver, product_select, config)
         except Exception as e:
             app_logger.error(f"Ошибка при выборе 'All products': {str(e)}")
             return False
 
-        if code_length == 2:
-            code_steps = [product_code]
-        else:
-            code_steps = []
-            for i in [2, 4, 6, 10]:
-                if i > code_length:
-                    break
-                if i == code_length:
-                    code_steps.append(product_code)
-                    break
-                code_steps.append(product_code[:i])
+        if code_length > 10:
+            app_logger.warning(
+                f"Код продукта {product_code} будет усечен до 10 знаков: {product_code[:10]}"
+            )
+            product_code = product_code[:10]
+            code_length = 10
 
-            if code_length > 10:
-                app_logger.warning(
-                    f"Код продукта {product_code} будет усечен до 10 знаков: {product_code[:10]}"
-                )
-                product_code = product_code[:10]
-                if product_code not in code_steps:
-                    code_steps.append(product_code)
+        code_steps = []
+        for stop in CODE_STEP_STOPS:
+            if stop >= code_length:
+                code_steps.append(product_code)
+                break
+            code_steps.append(product_code[:stop])
 
-        app_logger.debug(f"Последовательность выбора кодов: {' -> '.join(code_steps)}")
+        if app_logger.isEnabledFor(logging.DEBUG):
+            app_logger.debug(
+                "Последовательность выбора кодов: %s", " -> ".join(code_steps)
+            )
 
         for step, current_code in enumerate(code_steps, 1):
             if stop_event.is_set():
@@ -364,23 +723,28 @@ def select_parameters(
                 return True
 
             attempts = 0
-            while attempts < config["retry_count"]:
+            while attempts < retry_count:
                 try:
                     app_logger.debug(
-                        f"Шаг {step}/{len(code_steps)}: Попытка выбора кода {current_code}"
+                        "Шаг %s/%s: Попытка выбора кода %s",
+                        step,
+                        len(code_steps),
+                        current_code,
                     )
 
                     product_select = wait.until(
-                        EC.presence_of_element_located(
-                            (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-                        )
+                        EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
                     )
                     select = Select(product_select)
 
                     available_options = [
-                        opt.get_attribute("value") for opt in select.options
+                        value
+                        for value, _, _ in _option_values(driver, PRODUCT_SELECT_ID)
                     ]
-                    app_logger.debug(f"Доступные коды: {', '.join(available_options)}")
+                    if app_logger.isEnabledFor(logging.DEBUG):
+                        app_logger.debug(
+                            "Доступные коды: %s", ", ".join(available_options)
+                        )
 
                     if current_code not in available_options:
                         error_msg = (
@@ -390,27 +754,26 @@ def select_parameters(
                         return False
 
                     select.select_by_value(current_code)
-                    time.sleep(config["action_delay"])
+                    _wait_for_postback(driver, product_select, config)
 
-                    if "Div_PopupRestriction" in driver.page_source:
+                    if driver.find_elements(By.ID, "Div_PopupRestriction"):
                         error_msg = (
                             f"Аккаунт не имеет доступа к коду продукта {current_code}"
                         )
                         app_logger.error(error_msg)
                         return False
 
-                    product_select = wait.until(
-                        EC.presence_of_element_located(
-                            (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-                        )
+                    selected_value = _wait_for_selected_value(
+                        driver,
+                        PRODUCT_SELECT_ID,
+                        current_code,
+                        page_timeout,
                     )
-                    select = Select(product_select)
-                    selected_value = select.first_selected_option.get_attribute("value")
 
                     if selected_value == current_code:
                         app_logger.info(f"Успешно выбран код {current_code}")
 
-                        if "Div_PopupRestriction" in driver.page_source:
+                        if driver.find_elements(By.ID, "Div_PopupRestriction"):
                             error_msg = f"Аккаунт не имеет доступа к коду продукта {current_code}"
                             app_logger.error(error_msg)
                             return False
@@ -432,12 +795,12 @@ def select_parameters(
 
                 except Exception as e:
                     attempts += 1
-                    if attempts >= config["retry_count"]:
+                    if attempts >= retry_count:
                         app_logger.error(
                             f"Не удалось выбрать код {current_code} после {attempts} попыток: {str(e)}"
                         )
                         return False
-                    time.sleep(config["action_delay"])
+                    time.sleep(action_delay)
                     continue
 
         app_logger.info(f"Код продукта {product_code} успешно выбран")
@@ -449,13 +812,11 @@ def select_parameters(
 
             app_logger.debug("Попытка выбора radio button страны")
             country_radio = wait.until(
-                EC.element_to_be_clickable(
-                    (By.ID, "ctl00_NavigationControl_RadioButton_Country")
-                )
+                EC.element_to_be_clickable(COUNTRY_RADIO_LOCATOR)
             )
             driver.execute_script("arguments[0].click();", country_radio)
             app_logger.info("Radio button страны успешно выбран")
-            time.sleep(config["action_delay"])
+            _wait_for_postback(driver, country_radio, config)
 
             if stop_event.is_set():
                 app_logger.info("Остановка запрошена после выбора radio button")
@@ -468,41 +829,38 @@ def select_parameters(
             return False
 
         try:
-            app_logger.debug(f"Попытка выбора страны: {country_code}")
+            app_logger.debug("Попытка выбора страны: %s", country_code)
             country_select = wait.until(
-                EC.presence_of_element_located(
-                    (By.ID, "ctl00_NavigationControl_DropDownList_Country")
-                )
+                EC.presence_of_element_located(COUNTRY_SELECT_LOCATOR)
             )
             select = Select(country_select)
 
-            available_countries = [
-                f"{opt.get_attribute('value')}:{opt.get_attribute('title')}"
-                for opt in select.options
-            ]
-            app_logger.debug(f"Доступные страны: {', '.join(available_countries)}")
-
-            country_option = next(
-                (
-                    opt
-                    for opt in select.options
-                    if opt.get_attribute("title")
-                    and country_code in opt.get_attribute("title")
-                ),
-                None,
+            if app_logger.isEnabledFor(logging.DEBUG):
+                app_logger.debug(
+                    "Доступные страны: %s",
+                    ", ".join(
+                        f"{value}:{title}"
+                        for value, title, _ in _option_values(driver, COUNTRY_SELECT_ID)
+                    ),
+                )
+
+            country_matches = driver.find_elements(
+                By.XPATH,
+                f"//select[@id='{COUNTRY_SELECT_ID}']"
+                f"/option[contains(@title, {_xpath_literal(country_code)})]",
             )
 
-            if not country_option:
+            if not country_matches:
                 error_msg = f"Страна {country_code} не найдена в списке доступных стран"
                 app_logger.error(error_msg)
                 raise ValueError(error_msg)
 
-            country_value = country_option.get_attribute("value")
-            app_logger.debug(f"Найдено значение страны: {country_value}")
+            country_value = country_matches[0].get_attribute("value")
+            app_logger.debug("Найдено значение страны: %s", country_value)
 
             select.select_by_value(country_value)
             app_logger.info(f"Страна {country_code} успешно выбрана")
-            time.sleep(config["action_delay"])
+            _wait_for_postback(driver, country_select, config)
 
             if stop_event.is_set():
                 app_logger.info("Остановка запрошена после выбора страны")
@@ -542,177 +900,154 @@ def select_parameters(
             ),
         ]
 
-        app_logger.debug("Начало выбора основных параметров")
-        for param_id, param_value, param_name in main_parameters:
-            if stop_event.is_set():
-                app_logger.info(
-                    f"Остановка запрошена во время настройки параметра {param_name}"
-                )
-                return True
-
-            attempts = 0
-            while attempts < config["retry_count"]:
-                try:
-                    if stop_event.is_set():
-                        app_logger.info(
-                            f"Прерывание настройки параметра {param_name} по запросу"
-                        )
-                        return True
+        app_logger.debug("Начало выбора параметров отчета")
+        pending_parameters = _bulk_set_dropdowns(driver, wait, main_parameters, config)
+        for param_id, param_value, param_name in (*pending_parameters, *rows_parameters):
+            if not _set_dropdown(
+                driver, wait, param_id, param_value, param_name, config, stop_event
+            ):
+                return stop_event.is_set()
 
-                    app_logger.debug(
-                        f"Попытка установки параметра {param_name} = {param_value} (попытка {attempts + 1})"
-                    )
+        app_logger.info("Все параметры успешно установлены")
+        return True
 
-                    element = wait.until(
-                        EC.presence_of_element_located((By.ID, param_id))
-                    )
-                    select = Select(element)
+    except Exception as e:
+        app_logger.error(
+            f"Критическая ошибка при выборе параметров: {str(e)}\n"
+            f"Трассировка: {traceback.format_exc()}"
+        )
+        return False
 
-                    try:
-                        available_options = [
-                            f"{opt.get_attribute('value')}:{opt.text}"
-                            for opt in select.options
-                        ]
-                        app_logger.debug(
-                            f"Доступные значения для {param_name}: {', '.join(available_options)}"
-                        )
-                    except Exception as e:
-                        app_logger.debug(
-                            f"Ошибка получения опций: {str(e)}", exc_info=True
-                        )
 
-                    select.select_by_value(param_value)
-                    time.sleep(config["action_delay"])
+def _parse_export_rows(
+    lines, target_factor: float, stop
+) -> Optional[tuple[list[str], list[dict]]]:
+    headers = []
+    value_columns = []
+    rows = []
 
-                    if stop_event.is_set():
-                        app_logger.info(
-                            f"Остановка после установки параметра {param_name}"
-                        )
-                        return True
+    non_blank_rows = (
+        row
+        for row in csv.reader(lines, delimiter="\t")
+        if any(cell.strip() for cell in row)
+    )
+    for line_num, parts in enumerate(non_blank_rows):
+        if stop():
+            return None
+
+        if line_num == 0:
+            headers = ["Exporters"]
+            valid_columns = [True]
+            column_factors = []
+
+            for col in parts[1:]:
+                col = col.strip()
+                if not col:
+                    valid_columns.append(False)
+                    continue
 
-                    element = wait.until(
-                        EC.presence_of_element_located((By.ID, param_id))
-                    )
-                    select = Select(element)
-                    selected_value = select.first_selected_option.get_attribute("value")
+                unit_match = _UNIT_RE.search(col)
+                if not unit_match:
+                    found_unit = None
+                    for unit in WEIGHT_UNIT_NAMES:
+                        if unit in col:
+                            found_unit = unit
+                            break
 
-                    if selected_value == param_value:
-                        app_logger.info(
-                            f"Параметр {param_name} успешно установлен в {param_value}"
+                    if not found_unit:
+                        raise ValueError(
+                            f"Неверный формат заголовка (отсутствует единица измерения): {col}"
                         )
-                        break
-                    else:
-                        error_msg = f"Выбрано неверное значение: {selected_value} вместо {param_value}"
-                        raise ValueError(error_msg)
 
-                except Exception as e:
-                    attempts += 1
-                    if attempts >= config["retry_count"]:
-                        app_logger.error(
-                            f"Критическая ошибка при установке параметра {param_name}: {str(e)}",
-                            exc_info=True,
-                        )
-                        return False
+                    column_unit = found_unit
+                else:
+                    column_unit = unit_match.group(1)
 
-                    app_logger.warning(
-                        f"Повторная попытка ({attempts}/{config['retry_count']}) для параметра {param_name}"
-                    )
-                    time.sleep(config["action_delay"])
+                if match := _DATE_RE.match(col):
+                    header = match.group(1)
+                    headers.append(header[:12] + "..." if len(header) > 15 else header)
+                    column_factors.append(WEIGHT_UNITS[column_unit])
+                    valid_columns.append(True)
+                else:
+                    valid_columns.append(False)
 
-        app_logger.debug("Начало выбора параметров строк")
-        for param_id, param_value, param_name in rows_parameters:
-            if stop_event.is_set():
-                app_logger.info(f"Остановка запрошена перед настройкой {param_name}")
-                return True
+            valid_indices = [i for i, valid in enumerate(valid_columns) if valid]
+            value_columns = list(zip(valid_indices[1:], column_factors))
+            app_logger.debug("Обработаны заголовки: %s", len(headers))
+            continue
 
-            attempts = 0
-            while attempts < config["retry_count"]:
-                try:
-                    if stop_event.is_set():
-                        app_logger.info(
-                            f"Прерывание настройки строкового параметра {param_name}"
-                        )
-                        return True
+        if len(parts) < 2:
+            continue
 
-                    app_logger.debug(
-                        f"Попытка {attempts + 1}: Поиск элемента {param_id}"
-                    )
+        exporter = parts[0].strip()
+        if not exporter:
+            continue
 
-                    element = WebDriverWait(driver, config["page_timeout"]).until(
-                        EC.presence_of_element_located((By.ID, param_id))
-                    )
-                    app_logger.debug(f"Элемент {param_id} найден")
+        values = [exporter]
+        for i, source_factor in value_columns:
+            if i >= len(parts):
+                break
+            value = parts[i]
+            try:
+                value = value.strip()
+                if not value or value == "-":
+                    values.append(None)
+                    continue
 
-                    select = Select(element)
+                if value.startswith("(") and value.endswith(")"):
+                    value = "-" + value[1:-1]
 
-                    available_options = [
-                        f"{opt.get_attribute('value')}:{opt.text}"
-                        for opt in select.options
-                    ]
-                    app_logger.debug(
-                        f"Доступные значения для {param_name}: {', '.join(available_options)}"
-                    )
+                value = value.replace(",", "")
 
-                    select.select_by_value(param_value)
-                    time.sleep(config["action_delay"])
+                if value.count(".") > 1:
+                    values.append(value)
+                    continue
 
-                    if stop_event.is_set():
-                        app_logger.info(f"Остановка после установки {param_name}")
-                        return True
+                try:
+                    if "." in value:
+                        parsed_value = float(value)
+                    elif source_factor == target_factor:
+                        values.append(int(value))
+                        continue
+                    else:
+                        parsed_value = float(int(value))
 
-                    element = WebDriverWait(driver, config["page_timeout"]).until(
-                        EC.presence_of_element_located((By.ID, param_id))
-                    )
-                    select = Select(element)
-                    selected_value = select.first_selected_option.get_attribute("value")
+                    if source_factor != target_factor:
+                        parsed_value = parsed_value * source_factor / target_factor
 
-                    if selected_value == param_value:
-                        app_logger.info(
-                            f"Параметр {param_name} успешно установлен в {param_value}"
-                        )
-                        break
+                    if parsed_value.is_integer():
+                        values.append(int(parsed_value))
                     else:
-                        error_msg = (
-                            f"Ожидалось {param_value}, получено {selected_value} "
-                            f"для параметра {param_name}"
-                        )
-                        raise ValueError(error_msg)
+                        values.append(parsed_value)
 
-                except Exception as e:
-                    attempts += 1
-                    app_logger.warning(
-                        f"Попытка {attempts}: Ошибка установки параметра {param_name}\n"
-                        f"Тип: {type(e).__name__}\nОписание: {str(e)}"
-                    )
+                except ValueError:
+                    values.append(value)
 
-                    try:
-                        page_source = driver.page_source
-                        element_exists = param_id in page_source
-                        app_logger.debug(
-                            f"Элемент {param_id} присутствует в DOM: {element_exists}"
-                        )
-                    except Exception as e:
-                        app_logger.debug(
-                            f"Ошибка проверки DOM: {str(e)}", exc_info=True
-                        )
+            except ValueError as e:
+                app_logger.debug("Ошибка конвертации значения '%s': %s", value, e)
+                values.append(value)
+            except Exception as e:
+                app_logger.error(
+                    f"Непредвиденная ошибка обработки значения '{value}': {str(e)}"
+                )
+                values.append(value)
 
-                    time.sleep(config["action_delay"])
+        rows.append(dict(zip(headers, values)))
 
-                    if attempts >= config["retry_count"]:
-                        app_logger.error(
-                            f"Неудача после {config['retry_count']} попыток для параметра {param_name}"
-                        )
-                        return False
+    return headers, rows
 
-        app_logger.info("Все параметры успешно установлены")
-        return True
 
-    except Exception as e:
-        app_logger.error(
-            f"Критическая ошибка при выборе параметров: {str(e)}\n"
-            f"Трассировка: {traceback.format_exc()}"
-        )
-        return False
+def _merge_exporter_rows(exporters_data: dict, rows: list[dict]) -> None:
+    for row_dict in rows:
+        existing_data = exporters_data.get(row_dict["Exporters"])
+        if existing_data is None:
+            exporters_data[row_dict["Exporters"]] = row_dict
+        else:
+            existing_data.update(
+                (header, value)
+                for header, value in row_dict.items()
+                if value is not None and (value != 0 or header not in existing_data)
+            )
 
 
 def download_data(
@@ -724,27 +1059,35 @@ def download_data(
     stop_event: Event,
     results_base_dir: str,
 ) -> bool:
+    import pandas as pd
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.common.action_chains import ActionChains
+    from selenium.common.exceptions import (
+        TimeoutException,
+        NoSuchElementException,
+    )
+
     try:
-        app_logger.debug(f"Начало обработки для кода {product_code} и страны {country}")
+        app_logger.debug(
+            "Начало обработки для кода %s и страны %s", product_code, country
+        )
 
         if stop_event.is_set():
             app_logger.info("Запрос остановки перед началом загрузки данных")
             return True
 
-        current_dir = os.getcwd()
+        current_dir = config["download_dir"]
         product_dir = os.path.join(results_base_dir)
         downloaded_file = None
 
         try:
             parse_all_pages = config["parse_all_pages"]
+            target_factor = WEIGHT_UNITS[config["quantity_unit"]]
             all_headers = set()
             page_data_list = []
             exporters_data = {}
-            max_widths = {}
-            date_pattern = re.compile(r"^(\d{4}-M\d{2})")
-            unit_pattern = re.compile(
-                r",\s*({})\s*$".format("|".join(WEIGHT_UNITS.keys()))
-            )
             page_number = 1
 
             while True:
@@ -754,12 +1097,7 @@ def download_data(
 
                 app_logger.debug("Поиск кнопки экспорта в текстовый формат")
                 text_button = wait.until(
-                    EC.presence_of_element_located(
-                        (
-                            By.ID,
-                            "ctl00_PageContent_GridViewPanelControl_ImageButton_Text",
-                        )
-                    )
+                    EC.presence_of_element_located(TEXT_EXPORT_BUTTON_LOCATOR)
                 )
 
                 if not text_button.is_displayed():
@@ -774,21 +1112,21 @@ def download_data(
                     return True
 
                 app_logger.info("Инициирование загрузки файла")
-                before_download = set(Path(current_dir).glob("*.txt"))
+                before_download = _txt_names(current_dir)
                 driver.execute_script("arguments[0].click();", text_button)
 
-                download_start_time = time.time()
+                download_start_time = time.monotonic()
                 timeout = config["download_timeout"]
+                deadline = download_start_time + timeout
                 downloaded_file = None
 
-                while time.time() - download_start_time < timeout:
+                while time.monotonic() < deadline:
                     if stop_event.is_set():
                         app_logger.info("Прерывание во время ожидания загрузки файла")
                         return True
 
-                    after_download = set(Path(current_dir).glob("*.txt"))
-                    if new_files := after_download - before_download:
-                        downloaded_file = new_files.pop()
+                    if new_files := _txt_names(current_dir) - before_download:
+                        downloaded_file = Path(current_dir) / new_files.pop()
 
                         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
                         new_name = downloaded_file.with_stem(
@@ -798,12 +1136,12 @@ def download_data(
                         downloaded_file = new_name
                         page_number += 1
 
-                        dl_time = time.time() - download_start_time
+                        dl_time = time.monotonic() - download_start_time
                         app_logger.info(
                             f"Файл загружен за {dl_time:.2f} сек: {downloaded_file}"
                         )
                         break
-                    time.sleep(config["action_delay"])
+                    time.sleep(0.05)
                 else:
                     error_msg = f"Не удалось загрузить файл за {timeout} секунд"
                     app_logger.error(error_msg)
@@ -811,155 +1149,28 @@ def download_data(
                         downloaded_file.unlink()
                     return False
 
-                current_page_data = []
-                current_headers = []
-                valid_columns = []
-
-                with open(downloaded_file, "r", encoding="utf-8") as f:
-                    raw_lines = [ln.strip() for ln in f if ln.strip()]
-
-                for line_num, line in enumerate(raw_lines):
-                    if stop_event.is_set():
-                        app_logger.info("Прерывание обработки данных")
-                        return True
-
-                    parts = [p.strip('"').strip() for p in line.split("\t")]
-
-                    if line_num == 0:
-                        current_headers = ["Exporters"]
-                        valid_columns = [True]
-
-                        for idx, col in enumerate(parts[1:]):
-                            if not col:
-                                valid_columns.append(False)
-                                continue
-
-                            unit_match = unit_pattern.search(col)
-                            if not unit_match:
-                                found_unit = None
-                                for unit in WEIGHT_UNITS.keys():
-                                    if unit in col:
-                                        found_unit = unit
-                                        break
-
-                                if not found_unit:
-                                    error_msg = f"Неверный формат заголовка (отсутствует единица измерения): {col}"
-                                    app_logger.error(error_msg)
-                                    if downloaded_file and downloaded_file.is_file():
-                                        downloaded_file.unlink()
-                                    return False
-
-                                column_unit = found_unit
-                            else:
-                                column_unit = unit_match.group(1)
-
-                            if match := date_pattern.match(col):
-                                header = match.group(1)
-                                header = (
-                                    header[:12] + "..." if len(header) > 15 else header
-                                )
-                                current_headers.append(header)
-                                valid_columns.append(True)
-                            else:
-                                header = col[:12] + "..." if len(col) > 15 else col
-                                valid_columns.append(False)
-
-                        current_headers = [
-                            h
-                            for h, valid in zip(current_headers, valid_columns)
-                            if valid
-                        ]
-                        all_headers.update(current_headers[1:])
-                        app_logger.debug(
-                            f"Обработаны заголовки: {len(current_headers)}"
-                        )
-                        continue
-
-                    if len(parts) < 2 or not parts[0]:
-                        continue
-
-                    filtered_parts = []
-                    for i, val in enumerate(parts):
-                        if i < len(valid_columns) and valid_columns[i]:
-                            filtered_parts.append(val)
-
-                    if not filtered_parts:
-                        continue
-
-                    row_dict = {"Exporters": filtered_parts[0]}
-                    for header, value in zip(current_headers[1:], filtered_parts[1:]):
-                        try:
-                            value = value.strip()
-                            if not value or value == "-":
-                                row_dict[header] = None
-                                continue
-
-                            if value.startswith("(") and value.endswith(")"):
-                                value = "-" + value[1:-1]
-
-                            value = value.replace(",", "")
-
-                            if value.count(",") + value.count(".") > 1:
-                                row_dict[header] = value
-                                continue
-
-                            value = value.replace(",", ".")
-
-                            try:
-                                if "." in value:
-                                    parsed_value = float(value)
-                                else:
-                                    parsed_value = int(value)
-                                    parsed_value = float(parsed_value)
-
-                                source_factor = WEIGHT_UNITS[column_unit]
-                                target_unit = config["quantity_unit"]
-                                target_factor = WEIGHT_UNITS[target_unit]
-
-                                converted_value = (
-                                    parsed_value * source_factor / target_factor
-                                )
-
-                                if converted_value.is_integer():
-                                    row_dict[header] = int(converted_value)
-                                else:
-                                    row_dict[header] = float(converted_value)
+                try:
+                    with open(downloaded_file, "r", encoding="utf-8", newline="") as f:
+                        parsed = _parse_export_rows(f, target_factor, stop_event.is_set)
+                except ValueError as e:
+                    app_logger.error(str(e))
+                    if downloaded_file.is_file():
+                        downloaded_file.unlink()
+                    return False
 
-                            except ValueError:
-                                row_dict[header] = value
+                if parsed is None:
+                    app_logger.info("Прерывание обработки данных")
+                    return True
 
-                        except ValueError as e:
-                            app_logger.debug(
-                                f"Ошибка конвертации значения '{value}': {str(e)}"
-                            )
-                            row_dict[header] = value
-                        except Exception as e:
-                            app_logger.error(
-                                f"Непредвиденная ошибка обработки значения '{value}': {str(e)}"
-                            )
-                            row_dict[header] = value
-
-                    exporter = row_dict["Exporters"]
-
-                    if parse_all_pages:
-                        if exporter in exporters_data:
-                            existing_data = exporters_data[exporter]
-                            for header, value in row_dict.items():
-                                if value is not None and (
-                                    header not in existing_data or value != 0
-                                ):
-                                    existing_data[header] = value
-                        else:
-                            exporters_data[exporter] = row_dict.copy()
-
-                        current_page_data = list(exporters_data.values())
-                    else:
-                        current_page_data.append(row_dict)
+                current_headers, current_page_data = parsed
+                all_headers.update(current_headers[1:])
 
                 if not parse_all_pages:
                     page_data_list.extend(current_page_data)
                 else:
-                    page_data_list = list(exporters_data.values())
+                    _merge_exporter_rows(exporters_data, current_page_data)
+                    current_page_data = list(exporters_data.values())
+                    page_data_list = current_page_data
 
                 app_logger.info(
                     f"Обработано записей на текущей странице: {len(current_page_data)}"
@@ -973,12 +1184,7 @@ def download_data(
 
                 try:
                     previous_button = wait.until(
-                        EC.presence_of_element_located(
-                            (
-                                By.ID,
-                                "ctl00_PageContent_GridViewPanelControl_ImageButton_Previous",
-                            )
-                        )
+                        EC.presence_of_element_located(PREVIOUS_BUTTON_LOCATOR)
                     )
 
                     if previous_button.get_attribute("disabled"):
@@ -992,17 +1198,17 @@ def download_data(
                         )
                         break
 
-                    app_logger.debug(f"Текущий onclick перед кликом: {current_onclick}")
-
-                    period_match = re.search(
-                        r"SetValues\('prev','(\d+)'\)", current_onclick
+                    app_logger.debug(
+                        "Текущий onclick перед кликом: %s", current_onclick
                     )
+
+                    period_match = _PERIOD_RE.search(current_onclick)
                     if not period_match:
                         app_logger.error("Не удалось извлечь период из onclick")
                         break
 
                     current_period = period_match.group(1)
-                    app_logger.debug(f"Текущий период: {current_period}")
+                    app_logger.debug("Текущий период: %s", current_period)
 
                     ActionChains(driver).move_to_element(previous_button).pause(
                         config["action_delay"]
@@ -1011,42 +1217,36 @@ def download_data(
 
                     def onclick_changed(driver) -> bool:
                         try:
-                            new_button = driver.find_element(
-                                By.ID,
-                                "ctl00_PageContent_GridViewPanelControl_ImageButton_Previous",
+                            state = driver.execute_script(
+                                _PREVIOUS_BUTTON_STATE_JS, PREVIOUS_BUTTON_ID
                             )
+                        except Exception as e:
+                            app_logger.debug("Ошибка проверки: %s", e)
+                            return False
 
-                            if new_button.get_attribute("disabled"):
-                                app_logger.debug("Кнопка стала неактивной после клика")
-                                return True
-
-                            new_onclick = new_button.get_attribute("onclick")
+                        if not state:
+                            app_logger.debug("Кнопка не найдена")
+                            return False
 
-                            if not new_onclick:
-                                app_logger.debug("Новый onclick отсутствует")
-                                return False
+                        new_onclick, disabled = state
 
-                            new_period_match = re.search(
-                                r"SetValues\('prev','(\d+)'\)", new_onclick
-                            )
-                            return (
-                                new_period_match
-                                and new_period_match.group(1) != current_period
-                            )
+                        if disabled:
+                            app_logger.debug("Кнопка стала неактивной после клика")
+                            return True
 
-                        except Exception as e:
-                            app_logger.debug(f"Ошибка проверки: {str(e)}")
+                        if not new_onclick:
+                            app_logger.debug("Новый onclick отсутствует")
                             return False
 
+                        new_period_match = _PERIOD_RE.search(new_onclick)
+                        return bool(
+                            new_period_match
+                            and new_period_match.group(1) != current_period
+                        )
+
                     try:
                         WebDriverWait(driver, config["page_timeout"]).until(
-                            lambda d: (
-                                onclick_changed(d)
-                                or d.find_element(
-                                    By.ID,
-                                    "ctl00_PageContent_GridViewPanelControl_ImageButton_Previous",
-                                ).get_attribute("disabled")
-                            ),
+                            onclick_changed,
                             message="Не удалось обнаружить изменение состояния",
                         )
                         app_logger.debug("Состояние кнопки изменилось")
@@ -1055,22 +1255,14 @@ def download_data(
                         app_logger.error("Таймаут ожидания изменения состояния")
                         break
 
-                    final_button = driver.find_element(
-                        By.ID,
-                        "ctl00_PageContent_GridViewPanelControl_ImageButton_Previous",
-                    )
+                    final_button = driver.find_element(By.ID, PREVIOUS_BUTTON_ID)
 
                     if final_button.get_attribute("disabled"):
                         app_logger.debug("Достигнута первая страница после перехода")
                         break
 
                     wait.until(
-                        EC.presence_of_element_located(
-                            (
-                                By.ID,
-                                "ctl00_PageContent_GridViewPanelControl_ImageButton_Text",
-                            )
-                        )
+                        EC.presence_of_element_located(TEXT_EXPORT_BUTTON_LOCATOR)
                     )
                     app_logger.debug("Новая страница подтверждена")
 
@@ -1081,64 +1273,44 @@ def download_data(
                     app_logger.error(f"Критическая ошибка: {str(e)}")
                     break
 
-            sorted_headers = ["Exporters"] + sorted(
-                all_headers,
-                key=lambda x: (int(x.split("-")[0][:4]), int(x.split("-M")[1])),
-            )
+            period_keys = [
+                ((int(h[:4]), int(h.split("-M")[1])), h) for h in all_headers
+            ]
+            period_keys.sort()
+            sorted_headers = ["Exporters"] + [h for _, h in period_keys]
 
             if parse_all_pages:
-                max_widths = {h: len(h) for h in sorted_headers}
-                for exporter_data in exporters_data.values():
-                    for header in sorted_headers:
-                        str_val = str(exporter_data.get(header, ""))
-                        max_widths[header] = max(max_widths[header], len(str_val))
-
-                sorted_exporters = sorted(exporters_data.keys())
-                final_data = []
-                for exporter in sorted_exporters:
-                    exporter_data = exporters_data[exporter]
-                    ordered_row = [exporter_data.get(h, None) for h in sorted_headers]
-                    final_data.append(ordered_row)
+                df = (
+                    pd.DataFrame.from_dict(exporters_data, orient="index")
+                    .sort_index()
+                    .reindex(columns=sorted_headers)
+                    .reset_index(drop=True)
+                )
             else:
-                max_widths = {h: len(h) for h in sorted_headers}
-                for row in page_data_list:
-                    for header in sorted_headers:
-                        str_val = str(row.get(header, ""))
-                        max_widths[header] = max(max_widths[header], len(str_val))
-
-                final_data = []
-                for row_dict in page_data_list:
-                    ordered_row = [row_dict.get(h, None) for h in sorted_headers]
-                    final_data.append(ordered_row)
-
-            if final_data:
+                df = pd.DataFrame(page_data_list, columns=sorted_headers)
+
+            if not df.empty:
                 app_logger.debug("Создание структуры директорий")
                 os.makedirs(product_dir, exist_ok=True)
-                app_logger.debug(f"Директория создана: {product_dir}")
+                app_logger.debug("Директория создана: %s", product_dir)
 
                 new_filename = os.path.join(product_dir, f"{country}.xlsx")
-                app_logger.debug(f"Целевой файл Excel: {new_filename}")
-
-                with pd.ExcelWriter(new_filename, engine="xlsxwriter") as writer:
-                    df = pd.DataFrame(final_data, columns=sorted_headers)
-
-                    for col in df.columns[1:]:
-                        try:
-                            df[col] = pd.to_numeric(df[col])
-                        except (ValueError, TypeError):
-                            app_logger.debug(f"Не удалось преобразовать столбец {col}")
-                            continue
-
-                    df.to_excel(
-                        writer,
-                        sheet_name=country,
-                        index=False,
-                        startrow=1,
-                        header=False,
-                    )
+                app_logger.debug("Целевой файл Excel: %s", new_filename)
 
+                col_widths = df.fillna("").astype(str).apply(
+                    lambda c: c.str.len().max()
+                )
+                max_widths = {
+                    h: max(len(h), int(col_widths[h])) for h in sorted_headers
+                }
+
+                with pd.ExcelWriter(
+                    new_filename,
+                    engine="xlsxwriter",
+                    engine_kwargs={"options": {"constant_memory": True}},
+                ) as writer:
                     workbook = writer.book
-                    worksheet = writer.sheets[country]
+                    worksheet = workbook.add_worksheet(country)
 
                     header_format = workbook.add_format(
                         {
@@ -1161,15 +1333,18 @@ def download_data(
                     worksheet.set_row(0, 30)
                     for col_idx, header in enumerate(sorted_headers):
                         width = max_widths[header] + 2
-                        fmt = (
-                            data_formats[col_idx]
-                            if col_idx < len(data_formats)
-                            else data_formats[0]
+                        worksheet.set_column(
+                            col_idx, col_idx, width, data_formats[col_idx]
                         )
-                        worksheet.set_column(col_idx, col_idx, width, fmt)
                         worksheet.write(0, col_idx, header, header_format)
 
-                    last_row = len(final_data)
+                    cells = df.astype(object).where(df.notna(), None)
+                    for row_idx, row in enumerate(
+                        cells.itertuples(index=False, name=None), 1
+                    ):
+                        worksheet.write_row(row_idx, 0, row)
+
+                    last_row = len(df)
                     last_col = len(sorted_headers) - 1
 
                     border_format = workbook.add_format({"border": 1})
@@ -1189,23 +1364,6 @@ def download_data(
                         worksheet.freeze_panes(1, 0)
                         app_logger.debug("Закрепление первой строки применено")
 
-                        MAX_ROWS = 1048575
-                        MAX_COLS = 16383
-                        worksheet.conditional_format(
-                            0,
-                            0,
-                            MAX_ROWS,
-                            MAX_COLS,
-                            {
-                                "type": "formula",
-                                "criteria": "=TRUE()",
-                                "format": border_format,
-                            },
-                        )
-                        app_logger.debug(
-                            f"Границы применены ко всему листу A1:XFD{MAX_ROWS + 1}"
-                        )
-
                     app_logger.info(f"Файл успешно сохранён: {new_filename}")
             else:
                 app_logger.warning(
@@ -1240,16 +1398,17 @@ def download_data(
 def get_subproduct_codes(
     driver, wait, base_code: str, config: dict, stop_event: Event
 ) -> list[str]:
+    from selenium.webdriver.support.ui import Select
+    from selenium.webdriver.support import expected_conditions as EC
+
     try:
         if stop_event.is_set():
             app_logger.info("Остановка запрошена перед получением подкодов")
             return []
 
-        app_logger.debug(f"Получение подкодов для базового кода {base_code}")
+        app_logger.debug("Получение подкодов для базового кода %s", base_code)
         product_select = wait.until(
-            EC.presence_of_element_located(
-                (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-            )
+            EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
         )
         select = Select(product_select)
 
@@ -1258,16 +1417,14 @@ def get_subproduct_codes(
             return []
 
         select.select_by_value(base_code)
-        time.sleep(config["action_delay"])
+        _wait_for_postback(driver, product_select, config)
 
         if stop_event.is_set():
             app_logger.info("Остановка запрошена после выбора базового кода")
             return []
 
         product_select = wait.until(
-            EC.presence_of_element_located(
-                (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-            )
+            EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
         )
         select = Select(product_select)
 
@@ -1281,7 +1438,7 @@ def get_subproduct_codes(
             if code.startswith(base_code) and code != base_code and code.isdigit():
                 subcodes.append(code)
 
-        app_logger.debug(f"Найдено {len(subcodes)} подкодов для {base_code}")
+        app_logger.debug("Найдено %d подкодов для %s", len(subcodes), base_code)
         return sorted(subcodes)
     except Exception as e:
         app_logger.error(f"Ошибка получения подкодов для {base_code}: {str(e)}")
@@ -1292,7 +1449,7 @@ def process_single_code(
     driver, wait, product_code: str, config: dict, stop_event: Event, product_dir: str
 ) -> bool:
     try:
-        app_logger.debug(f"Начало обработки одиночного кода {product_code}")
+        app_logger.debug("Начало обработки одиночного кода %s", product_code)
 
         if stop_event.is_set():
             app_logger.info("Остановка запрошена перед созданием директории")
@@ -1339,6 +1496,36 @@ def process_single_code(
         return False
 
 
+def _prune_empty(start_path: str) -> bool:
+    subdirs = []
+    empty = True
+    try:
+        with os.scandir(start_path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                else:
+                    empty = False
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        app_logger.error(f"Ошибка чтения директории {start_path}: {str(e)}")
+        return False
+
+    for dir_path in subdirs:
+        if not _prune_empty(dir_path):
+            empty = False
+            continue
+        try:
+            os.rmdir(dir_path)
+            app_logger.debug("Удалена пустая директория: %s", dir_path)
+        except OSError as e:
+            app_logger.error(f"Ошибка при удалении директории {dir_path}: {str(e)}")
+            empty = False
+
+    return empty
+
+
 def process_product_code(
     driver,
     wait,
@@ -1348,9 +1535,14 @@ def process_product_code(
     stop_event: Event,
     results_base_dir: str,
 ) -> bool:
+    from selenium.webdriver.support.ui import Select
+    from selenium.webdriver.support import expected_conditions as EC
+
+    results_prefix = results_base_dir + os.sep
+
     try:
         app_logger.debug(
-            f"Начало обработки кода продукта {product_code} с глубиной {parse_depth}"
+            "Начало обработки кода продукта %s с глубиной %s", product_code, parse_depth
         )
         code_length = len(product_code)
 
@@ -1361,34 +1553,15 @@ def process_product_code(
             "level4": 8,
         }[parse_depth]
 
-        def cleanup_empty_dirs(start_path: str) -> None:
-            for root, dirs, files in os.walk(start_path, topdown=False):
-                for dir_name in dirs:
-                    dir_path = os.path.join(root, dir_name)
-                    try:
-                        if not os.listdir(dir_path):
-                            os.rmdir(dir_path)
-                            app_logger.debug(f"Удалена пустая директория: {dir_path}")
-                    except Exception as e:
-                        app_logger.error(
-                            f"Ошибка при удалении директории {dir_path}: {str(e)}"
-                        )
-
         def create_hierarchy_path(code: str) -> str:
-            base_dir = os.path.join(results_base_dir, code[:2])
-
-            if len(code) <= 2:
-                return base_dir
-
-            paths = [base_dir]
+            path = results_prefix + code[:2]
             if len(code) >= 4:
-                paths.append(code[:4])
+                path += os.sep + code[:4]
             if len(code) >= 6:
-                paths.append(code[:6])
+                path += os.sep + code[:6]
             if len(code) >= 8:
-                paths.append(code)
-
-            return os.path.join(*paths)
+                path += os.sep + code
+            return path
 
         if parse_depth in ["level3", "level4"]:
             is_valid_length = (
@@ -1404,13 +1577,11 @@ def process_product_code(
 
                 try:
                     product_select = wait.until(
-                        EC.presence_of_element_located(
-                            (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-                        )
+                        EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
                     )
                     select = Select(product_select)
                     select.select_by_value("TOTAL")
-                    time.sleep(config["action_delay"])
+                    _wait_for_postback(driver, product_select, config)
                 except Exception as e:
                     app_logger.error(f"Ошибка при выборе 'TOTAL': {str(e)}")
                     return False
@@ -1431,16 +1602,11 @@ def process_product_code(
                     for step_code in code_steps:
                         try:
                             product_select = wait.until(
-                                EC.presence_of_element_located(
-                                    (
-                                        By.ID,
-                                        "ctl00_NavigationControl_DropDownList_Product",
-                                    )
-                                )
+                                EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
                             )
                             select = Select(product_select)
                             select.select_by_value(step_code)
-                            time.sleep(config["action_delay"])
+                            _wait_for_postback(driver, product_select, config)
                         except Exception as e:
                             app_logger.error(
                                 f"Ошибка при выборе кода {step_code}: {str(e)}"
@@ -1484,7 +1650,7 @@ def process_product_code(
                     driver, wait, product_code, config, stop_event, hierarchy_path
                 )
                 if not success:
-                    cleanup_empty_dirs(os.path.join(results_base_dir, product_code[:2]))
+                    _prune_empty(results_prefix + product_code[:2])
                 return success
 
         else:
@@ -1494,7 +1660,7 @@ def process_product_code(
                     driver, wait, product_code, config, stop_event, hierarchy_path
                 )
                 if not success:
-                    cleanup_empty_dirs(os.path.join(results_base_dir, product_code[:2]))
+                    _prune_empty(results_prefix + product_code[:2])
                 return success
 
             current_codes = [product_code]
@@ -1547,40 +1713,45 @@ def process_product_code(
                 processed_base_codes.add(code[:2])
 
         for base_code in processed_base_codes:
-            cleanup_empty_dirs(os.path.join(results_base_dir, base_code))
+            _prune_empty(results_prefix + base_code)
 
         return success
 
     except Exception as e:
         app_logger.error(f"Ошибка обработки кода {product_code}: {str(e)}")
-        cleanup_empty_dirs(os.path.join(results_base_dir, product_code[:2]))
+        _prune_empty(results_prefix + product_code[:2])
         return False
 
 
-def process_data(driver, config: dict, stop_event: Event) -> bool:
+def process_data(
+    driver,
+    config: dict,
+    stop_event: Event,
+    product_codes: list[str],
+    results_base_dir: str,
+) -> bool:
+    from selenium.webdriver.support.ui import Select
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    stop = stop_event.is_set
+
     try:
-        wait = WebDriverWait(driver, config["page_timeout"])
-        app_logger.debug(f"Переход на страницу {PRODUCT_URL}")
+        wait = WebDriverWait(driver, config["page_timeout"], poll_frequency=0.2)
+        app_logger.debug("Переход на страницу %s", PRODUCT_URL)
 
-        if stop_event.is_set():
+        if stop():
             app_logger.info("Остановка запрошена перед загрузкой страницы")
             return True
 
         driver.get(PRODUCT_URL)
         app_logger.debug("Страница успешно загружена")
 
-        if stop_event.is_set():
+        if stop():
             app_logger.info("Остановка запрошена после загрузки страницы")
             return True
 
-        current_dir = os.getcwd()
-        current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        results_base_dir = os.path.join(
-            current_dir, "results", f"result_{current_time}"
-        )
-        app_logger.debug(f"Создание базовой директории результатов: {results_base_dir}")
-
-        total_products = len(config["product_codes"])
+        total_products = len(product_codes)
         app_logger.info(f"Всего кодов продуктов для обработки: {total_products}")
         app_logger.info(f"Всего стран для обработки: {len(config['countries'])}")
         app_logger.info(f"Уровень парсинга: {config['parse_depth']}")
@@ -1588,19 +1759,17 @@ def process_data(driver, config: dict, stop_event: Event) -> bool:
         try:
             app_logger.debug("Выбор 'All products' для начального состояния")
             product_select = wait.until(
-                EC.presence_of_element_located(
-                    (By.ID, "ctl00_NavigationControl_DropDownList_Product")
-                )
+                EC.presence_of_element_located(PRODUCT_SELECT_LOCATOR)
             )
             select = Select(product_select)
             select.select_by_value("TOTAL")
-            time.sleep(config["action_delay"])
+            _wait_for_postback(driver, product_select, config)
         except Exception as e:
             app_logger.error(f"Ошибка при выборе 'All products': {str(e)}")
             return False
 
-        for idx, product_code in enumerate(config["product_codes"], 1):
-            if stop_event.is_set():
+        for idx, product_code in enumerate(product_codes, 1):
+            if stop():
                 app_logger.info("Остановка запрошена во время обработки продуктов")
                 return True
 
@@ -1612,7 +1781,7 @@ def process_data(driver, config: dict, stop_event: Event) -> bool:
                 app_logger.warning(f"Неверный формат кода продукта: {product_code}")
                 continue
 
-            if stop_event.is_set():
+            if stop():
                 app_logger.info(
                     f"Остановка запрошена перед обработкой кода {product_code}"
                 )
@@ -1633,14 +1802,14 @@ def process_data(driver, config: dict, stop_event: Event) -> bool:
             else:
                 app_logger.error(f"Ошибка при обработке кода {product_code}")
 
-            if stop_event.is_set():
+            if stop():
                 app_logger.info(
                     f"Остановка запрошена после обработки кода {product_code}"
                 )
                 return True
 
-            app_logger.debug("Ожидание перед следующим кодом продукта")
-            time.sleep(config["action_delay"])
+            app_logger.debug("Ожидание готовности страницы перед следующим кодом")
+            _wait_for_document_ready(driver, config)
 
         app_logger.info("Обработка всех данных успешно завершена")
         return True
@@ -1652,57 +1821,121 @@ def process_data(driver, config: dict, stop_event: Event) -> bool:
         return False
 
 
-def login_to_trademap(config: dict, stop_event: Event) -> bool:
-    app_logger.info("Начало процесса входа в Trade Map")
-
-    if stop_event.is_set():
-        app_logger.info("Остановка запрошена перед началом входа в систему")
-        return True
-
-    if not check_chrome_installed():
-        app_logger.error("Chrome не установлен. Вход невозможен")
-        return False
-
-    current_dir = os.getcwd()
+def _create_driver(download_dir: str, headless: bool):
+    from selenium import webdriver
 
     chrome_options = webdriver.ChromeOptions()
     prefs = {
-        "download.default_directory": current_dir,
+        "download.default_directory": download_dir,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True,
         "profile.default_content_settings.popups": 0,
         "profile.default_content_setting_values.automatic_downloads": 1,
     }
+    if headless:
+        prefs["profile.managed_default_content_settings.images"] = 2
+        prefs["profile.default_content_setting_values.notifications"] = 2
+        for argument in HEADLESS_CHROME_ARGUMENTS:
+            chrome_options.add_argument(argument)
     chrome_options.add_experimental_option("prefs", prefs)
     chrome_options.add_argument("--disable-popup-blocking")
 
     app_logger.debug("Инициализация драйвера Chrome")
-    driver = webdriver.Chrome(options=chrome_options)
-    wait = WebDriverWait(driver, config["page_timeout"])
+    return webdriver.Chrome(options=chrome_options)
 
+
+def _quit_driver(driver) -> None:
     try:
-        if stop_event.is_set():
-            app_logger.info("Остановка запрошена перед загрузкой страницы")
-            return True
+        driver.quit()
+    except Exception as e:
+        app_logger.debug("Ошибка закрытия браузера: %s", e)
 
-        app_logger.debug(f"Переход на страницу {BASE_URL}")
-        driver.get(BASE_URL)
-        app_logger.debug("Страница успешно загружена")
 
-        if stop_event.is_set():
-            app_logger.info("Остановка запрошена перед авторизацией")
-            return True
+def _quit_idle_drivers() -> None:
+    while IDLE_DRIVERS:
+        _, driver = IDLE_DRIVERS.popitem()
+        _quit_driver(driver)
+
+
+atexit.register(_quit_idle_drivers)
+
+
+def _get_driver(download_dir: str, headless: bool):
+    driver = IDLE_DRIVERS.pop((download_dir, headless), None)
+    if driver is not None:
+        try:
+            if driver.session_id and driver.current_url:
+                app_logger.debug("Повторное использование запущенного браузера")
+                return driver
+        except Exception as e:
+            app_logger.debug("Запущенный браузер недоступен: %s", e)
+        _quit_driver(driver)
+
+    return _create_driver(download_dir, headless)
+
+
+def _reset_driver(driver) -> None:
+    driver.execute_script(_CLEAR_STORAGE_JS)
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    driver.get("about:blank")
+
+
+def _release_driver(download_dir: str, headless: bool, driver) -> None:
+    if not headless:
+        _quit_driver(driver)
+        return
+
+    try:
+        _reset_driver(driver)
+    except Exception as e:
+        app_logger.debug("Не удалось очистить сессию браузера: %s", e)
+        _quit_driver(driver)
+        return
+
+    IDLE_DRIVERS[download_dir, headless] = driver
+
 
-        app_logger.debug("Поиск кнопки логина")
-        login_button = wait.until(
-            EC.element_to_be_clickable((By.ID, "ctl00_MenuControl_marmenu_login"))
+def _sign_in(driver, config: dict, stop_event: Event) -> bool:
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+
+    wait = WebDriverWait(driver, config["page_timeout"])
+    stop = stop_event.is_set
+
+    if stop():
+        app_logger.info("Остановка запрошена перед загрузкой страницы")
+        return True
+
+    app_logger.debug("Переход на страницу %s", BASE_URL)
+    driver.get(BASE_URL)
+    app_logger.debug("Страница успешно загружена")
+
+    if stop():
+        app_logger.info("Остановка запрошена перед авторизацией")
+        return True
+
+    app_logger.debug("Поиск кнопки логина")
+    login_button = wait.until(EC.element_to_be_clickable((By.ID, LOGIN_BUTTON_ID)))
+    login_button.click()
+    app_logger.debug("Кнопка логина успешно нажата")
+
+    def login_form_or_signed_in(d):
+        if username_fields := d.find_elements(By.ID, "Username"):
+            return username_fields[0]
+        return (
+            "trademap.org" in d.current_url
+            and d.execute_script("return document.readyState") == "complete"
+            and not d.find_elements(By.ID, LOGIN_BUTTON_ID)
         )
-        login_button.click()
-        app_logger.debug("Кнопка логина успешно нажата")
 
-        app_logger.debug("Ожидание полей ввода логина и пароля")
-        username_field = wait.until(EC.presence_of_element_located((By.ID, "Username")))
+    app_logger.debug("Ожидание полей ввода логина и пароля")
+    username_field = wait.until(login_form_or_signed_in)
+
+    if username_field is True:
+        app_logger.info("Сессия уже авторизована, ввод учетных данных пропущен")
+    else:
         password_field = driver.find_element(By.ID, "Password")
 
         app_logger.debug("Ввод учетных данных")
@@ -1715,41 +1948,58 @@ def login_to_trademap(config: dict, stop_event: Event) -> bool:
         submit_button.click()
         app_logger.debug("Кнопка подтверждения нажата")
 
-        if stop_event.is_set():
+        if stop():
             app_logger.info("Остановка запрошена после авторизации")
             return True
 
         app_logger.debug("Проверка результата входа")
-        if "Invalid username or password" in driver.page_source:
+        if driver.find_elements(By.XPATH, INVALID_LOGIN_XPATH):
             error_msg = "Неверный логин или пароль"
             app_logger.error(error_msg)
             return False
 
-        app_logger.debug("Проверка наличия капчи после входа")
-        if not handle_captcha(driver, config, stop_event):
-            app_logger.error("Не удалось пройти капчу")
-            return False
+    app_logger.debug("Проверка наличия капчи после входа")
+    if not handle_captcha(driver, config, stop_event):
+        app_logger.error("Не удалось пройти капчу")
+        return False
 
-        if stop_event.is_set():
-            app_logger.info("Остановка запрошена перед обработкой данных")
-            return True
+    if stop():
+        app_logger.info("Остановка запрошена перед обработкой данных")
+        return True
 
-        app_logger.debug("Проверка успешности входа")
-        if BASE_URL not in driver.current_url:
-            error_msg = "Неожиданная ошибка при входе"
-            app_logger.error(error_msg)
+    app_logger.debug("Проверка успешности входа")
+    if BASE_URL not in driver.current_url:
+        error_msg = "Неожиданная ошибка при входе"
+        app_logger.error(error_msg)
+        return False
+
+    app_logger.info("Успешный вход в систему")
+    return True
+
+
+def _run_session(
+    config: dict,
+    stop_event: Event,
+    product_codes: list[str],
+    results_base_dir: str,
+) -> bool:
+    os.makedirs(config["download_dir"], exist_ok=True)
+    driver = _get_driver(config["download_dir"], config["headless"])
+
+    try:
+        if not _sign_in(driver, config, stop_event):
             return False
 
-        app_logger.info("Успешный вход в систему")
+        if stop_event.is_set():
+            return True
 
         app_logger.info("Начало обработки данных...")
 
-        if not process_data(driver, config, stop_event):
+        if not process_data(driver, config, stop_event, product_codes, results_base_dir):
             error_msg = "Ошибка при обработке данных"
             app_logger.error(error_msg)
             return False
 
-        app_logger.info("Процесс успешно завершен")
         return True
 
     except Exception as e:
@@ -1758,8 +2008,75 @@ def login_to_trademap(config: dict, stop_event: Event) -> bool:
         return False
 
     finally:
-        app_logger.debug("Закрытие браузера")
-        driver.quit()
+        app_logger.debug("Очистка сессии браузера")
+        _release_driver(config["download_dir"], config["headless"], driver)
+
+
+def _split_by_chapter(product_codes: list[str], workers: int) -> list[list[str]]:
+    chapters = {}
+    for code in product_codes:
+        chapters.setdefault(code[:2], []).append(code)
+
+    batches = [[] for _ in range(min(workers, len(chapters)))]
+    for codes in sorted(chapters.values(), key=len, reverse=True):
+        min(batches, key=len).extend(codes)
+    return batches
+
+
+def login_to_trademap(config: dict, stop_event: Event) -> bool:
+    app_logger.info("Начало процесса входа в Trade Map")
+
+    if stop_event.is_set():
+        app_logger.info("Остановка запрошена перед началом входа в систему")
+        return True
+
+    if not check_chrome_installed():
+        app_logger.error("Chrome не установлен. Вход невозможен")
+        return False
+
+    current_dir = os.getcwd()
+    current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    results_base_dir = os.path.join(current_dir, "results", f"result_{current_time}")
+    app_logger.debug("Создание базовой директории результатов: %s", results_base_dir)
+
+    product_codes = config["product_codes"]
+    batches = _split_by_chapter(product_codes, config["workers"])
+    workers = len(batches)
+
+    if workers <= 1:
+        success = _run_session(
+            {**config, "download_dir": current_dir},
+            stop_event,
+            product_codes,
+            results_base_dir,
+        )
+    else:
+        app_logger.info(f"Запуск {workers} параллельных сессий браузера")
+        downloads_dir = os.path.join(current_dir, "downloads")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _run_session,
+                    {
+                        **config,
+                        "download_dir": os.path.join(
+                            downloads_dir, f"worker_{worker}"
+                        ),
+                    },
+                    stop_event,
+                    batch,
+                    results_base_dir,
+                )
+                for worker, batch in enumerate(batches)
+            ]
+            success = all([future.result() for future in futures])
+
+    if not success:
+        return False
+
+    app_logger.info("Процесс успешно завершен")
+    return True
 
 
 def main(stop_event: Event) -> bool:
@@ -1772,10 +2089,14 @@ def main(stop_event: Event) -> bool:
 
         app_logger.debug("Попытка загрузки конфигурационного файла")
         try:
-            config_path = os.path.join("bot", "config.json")
-            with open(config_path, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                app_logger.debug("Конфигурационный файл успешно загружен")
+            raw_config = Path("bot", "config.json").read_bytes()
+            config_digest = hashlib.blake2b(raw_config, digest_size=16).digest()
+            validated_config = VALIDATED_CONFIG_FILES.get(config_digest)
+            if validated_config is None:
+                config = (json if orjson is None else orjson).loads(raw_config)
+            else:
+                config = dict(validated_config)
+            app_logger.debug("Конфигурационный файл успешно загружен")
         except FileNotFoundError:
             error_msg = "Файл конфигурации config.json не найден"
             app_logger.error(error_msg)
@@ -1793,11 +2114,18 @@ def main(stop_event: Event) -> bool:
             app_logger.info("Остановка запрошена перед валидацией конфига")
             return True
 
-        app_logger.debug("Начало валидации конфигурации")
-        if not validate_config(config):
-            app_logger.error("Валидация конфигурации не пройдена")
-            return False
-        app_logger.info("Валидация конфигурации успешно пройдена")
+        if validated_config is not None:
+            app_logger.info("Конфигурация не изменилась с последней проверки")
+        else:
+            app_logger.debug("Начало валидации конфигурации")
+            if not validate_config(config):
+                app_logger.error("Валидация конфигурации не пройдена")
+                return False
+
+            if len(VALIDATED_CONFIG_FILES) >= MAX_VALIDATED_CONFIGS:
+                VALIDATED_CONFIG_FILES.pop(next(iter(VALIDATED_CONFIG_FILES)))
+            VALIDATED_CONFIG_FILES[config_digest] = dict(config)
+            app_logger.info("Валидация конфигурации успешно пройдена")
 
         if stop_event.is_set():
             app_logger.info("Остановка запрошена перед запуском основного процесса")
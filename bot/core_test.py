@@ -4,19 +4,23 @@ sys.dont_write_bytecode = True
 
 import os
 import json
-import time
-import glob
 import logging
 from pathlib import Path
 from threading import Event
 from datetime import datetime
 from logging.handlers import RotatingFileHandler
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from bot.log_retention import prune_old_logs
+
 
 def setup_logging() -> logging.Logger:
     logs_dir = os.path.join("bot", "logs")
-    if not os.path.exists(logs_dir):
-        os.makedirs(logs_dir)
+    os.makedirs(logs_dir, exist_ok=True)
 
     MAX_LOG_FILES = 5
     MAX_BYTES = 1024 * 1024
@@ -24,19 +28,9 @@ def setup_logging() -> logging.Logger:
     current_time = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     log_file = os.path.join(logs_dir, f"log_{current_time}.log")
 
-    log_files = []
-    for pattern in ["log_*.log", "log_*.log.*"]:
-        log_files.extend(glob.glob(os.path.join(logs_dir, pattern)))
-
-    log_files = sorted(log_files, key=os.path.getctime)
-
-    while len(log_files) >= MAX_LOG_FILES:
-        try:
-            oldest_file = log_files.pop(0)
-            os.remove(oldest_file)
-            print(f"Удален старый лог файл: {oldest_file}")
-        except Exception as e:
-            print(f"Ошибка при удалении старого лог файла {oldest_file}: {e}")
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
 
     for lib in ["selenium", "urllib3", "webdriver", "WDM"]:
         logging.getLogger(lib).setLevel(logging.ERROR)
@@ -67,6 +61,8 @@ def setup_logging() -> logging.Logger:
 
     app_logger.propagate = False
 
+    prune_old_logs(logs_dir, MAX_LOG_FILES)
+
     return app_logger
 
 
@@ -91,8 +87,8 @@ def main(stop_event: Event) -> bool:
             app_logger.error("Configuration file not found")
             return False
 
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = json.load(f)
+        raw_config = config_path.read_bytes()
+        config = (json if orjson is None else orjson).loads(raw_config)
 
         app_logger.info("Configuration loaded successfully")
 
@@ -104,22 +100,14 @@ def main(stop_event: Event) -> bool:
             app_logger.error("Missing product codes or countries in config")
             return False
 
-        time.sleep(2)
-
-        if stop_event.is_set():
+        if stop_event.wait(timeout=2):
             app_logger.info("Received stop signal during initialization")
             return False
 
         app_logger.info("Bot initialized successfully")
 
-        while not stop_event.is_set():
-            try:
-                time.sleep(1)
-                app_logger.debug("Bot working...")
-
-            except Exception as e:
-                app_logger.error(f"Error in main loop: {str(e)}")
-                continue
+        while not stop_event.wait(timeout=1):
+            app_logger.debug("Bot working...")
 
         app_logger.info("Bot stopped gracefully")
         return True
@@ -0,0 +1,28 @@
+import os
+import logging
+from threading import Thread
+
+
+def _remove_old_logs(log_files: list) -> None:
+    logger = logging.getLogger("app")
+    for oldest_file in log_files:
+        try:
+            os.remove(oldest_file)
+            logger.debug("Удален старый лог файл: %s", oldest_file)
+        except Exception as e:
+            logger.error(f"Ошибка при удалении старого лог файла {oldest_file}: {e}")
+
+
+def prune_old_logs(logs_dir: str, max_files: int) -> None:
+    with os.scandir(logs_dir) as entries:
+        log_files = sorted(
+            (entry.stat().st_ctime, entry.path)
+            for entry in entries
+            if entry.name.startswith("log_")
+            and (entry.name.endswith(".log") or ".log." in entry.name)
+        )
+
+    excess = len(log_files) - max_files
+    if excess > 0:
+        expired = [path for _, path in log_files[:excess]]
+        Thread(target=_remove_old_logs, args=(expired,), daemon=True).start()
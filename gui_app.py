@@ -1,19 +1,19 @@
-import socket
 import sys
-import time
 
 sys.dont_write_bytecode = True
 
-import subprocess
-import sys
+import os
+import time
+import queue
+import socket
 import threading
-import requests
+from typing import Optional, Any
+
+import psutil
+import pystray
 import customtkinter as ctk
-import webbrowser
 from PIL import Image
-import pystray
-import os
-from typing import Optional, Any
+
 from bot.core import setup_logging
 
 app_logger = setup_logging()
@@ -27,11 +27,12 @@ class ServerControlGUI:
         self.root.resizable(False, False)
 
         self.server_process: Optional[threading.Thread] = None
-        self.status_check_thread: Optional[threading.Thread] = None
         self.server: Optional[Any] = None
         self.running: bool = False
         self.tray_icon: Any = None
         self.is_in_tray: bool = False
+        self.is_quitting: bool = False
+        self.log_queue: queue.SimpleQueue = queue.SimpleQueue()
 
         self.load_theme_settings()
 
@@ -99,9 +100,11 @@ class ServerControlGUI:
         )
         self.status_label.pack(side="left", padx=10)
 
+        self.status_var = ctk.StringVar(value="Stopped")
+        self._last_color = "red"
         self.status_value = ctk.CTkLabel(
             self.status_frame,
-            text="Stopped",
+            textvariable=self.status_var,
             font=("Roboto", 14, "bold"),
             text_color="red",
         )
@@ -152,7 +155,7 @@ class ServerControlGUI:
         self.open_server_button = ctk.CTkButton(
             self.main_frame,
             text="Open Server Interface →",
-            command=lambda: webbrowser.open("http://localhost:5000"),
+            command=self.open_server_interface,
             font=("Roboto", 12),
             fg_color="transparent",
             text_color=["#0066cc", "#4da6ff"],
@@ -179,6 +182,29 @@ class ServerControlGUI:
         self.log_text = ctk.CTkTextbox(self.log_frame, height=150, font=("Roboto", 12))
         self.log_text.pack(padx=10, pady=5, fill="both", expand=True)
 
+    def _set_status(self, text: str, color: str) -> None:
+        self.status_var.set(text)
+        if color != self._last_color:
+            self.status_value.configure(text_color=color)
+            self._last_color = color
+
+    def _log(self, message: str) -> None:
+        self.log_queue.put(message)
+
+    def _drain_log(self) -> None:
+        messages = []
+        try:
+            while True:
+                messages.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+
+        if messages:
+            self.log_text.insert("end", "".join(messages))
+            self.log_text.see("end")
+
+        self.root.after(50, self._drain_log)
+
     def setup_tray(self) -> None:
         menu = (
             pystray.MenuItem("Show", self.show_window),
@@ -187,6 +213,12 @@ class ServerControlGUI:
         self.tray_icon = pystray.Icon(
             "server_control", self.icon_image, "Server Control", menu
         )
+        self.tray_icon.run_detached(setup=lambda icon: None)
+
+    def open_server_interface(self) -> None:
+        import webbrowser
+
+        webbrowser.open("http://localhost:5000")
 
     def toggle_theme(self) -> None:
         new_mode = "dark" if self.theme_switch.get() == "dark" else "light"
@@ -194,216 +226,139 @@ class ServerControlGUI:
 
     def start_server(self) -> None:
         if not self.running:
-            import socket
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+                sock.settimeout(0.2)
+                in_use = sock.connect_ex(("127.0.0.1", 5000)) == 0
 
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            try:
-                sock.bind(("localhost", 5000))
-                sock.close()
+            if not in_use:
                 self.start_server_thread()
-            except socket.error:
-                self.log_text.insert("end", "Error: Port 5000 is already in use!\n")
-                self.log_text.insert(
-                    "end", "Please check if another instance is running.\n"
+            else:
+                self._log(
+                    "Error: Port 5000 is already in use!\n"
+                    "Please check if another instance is running.\n"
                 )
                 app_logger.error("Port 5000 is already in use!")
                 app_logger.error("Please check if another instance is running.")
                 if sys.platform == "win32":
                     try:
-                        netstat_result = subprocess.run(
-                            ["netstat", "-ano"],
-                            capture_output=True,
-                            text=True,
-                            shell=True,
-                        )
-
-                        pids = set()
-                        for line in netstat_result.stdout.splitlines():
-                            if ":5000" in line and "LISTENING" in line:
-                                parts = line.strip().split()
-                                pid = parts[-1]
-                                pids.add(pid)
-
+                        pids = {
+                            conn.pid
+                            for conn in psutil.net_connections(kind="tcp")
+                            if conn.laddr
+                            and conn.laddr.port == 5000
+                            and conn.status == psutil.CONN_LISTEN
+                            and conn.pid
+                            and conn.pid != os.getpid()
+                        }
+
+                        killed_any = False
                         for pid in pids:
                             try:
-                                subprocess.run(
-                                    ["taskkill", "/F", "/PID", pid],
-                                    capture_output=True,
-                                    shell=True,
-                                    timeout=5,
-                                )
-                                self.log_text.insert(
-                                    "end", f"Killed process with PID: {pid}\n"
-                                )
+                                process = psutil.Process(pid)
+                                for child in process.children(recursive=True):
+                                    child.kill()
+                                process.kill()
+                                process.wait(timeout=5)
+                                self._log(f"Killed process with PID: {pid}\n")
                                 app_logger.info(f"Killed process with PID: {pid}")
-                                self.start_server_thread()
-                            except subprocess.TimeoutExpired:
-                                self.log_text.insert(
-                                    "end", f"Timeout killing PID {pid}\n"
-                                )
+                                killed_any = True
+                            except psutil.TimeoutExpired:
+                                self._log(f"Timeout killing PID {pid}\n")
                                 app_logger.error(f"Timeout killing PID {pid}")
                             except Exception as e:
-                                self.log_text.insert(
-                                    "end", f"Error killing PID {pid}: {e}\n"
-                                )
+                                self._log(f"Error killing PID {pid}: {e}\n")
                                 app_logger.error(f"Error killing PID {pid}: {e}")
+
+                        if killed_any:
+                            self.start_server_thread()
                     except Exception as e:
-                        self.log_text.insert("end", f"Process check error: {e}\n")
+                        self._log(f"Process check error: {e}\n")
                         app_logger.error(f"Process check error: {e}")
-        self.log_text.see("end")
 
     def stop_server(self) -> None:
         if self.running:
-            MAX_RETRIES = 3
-            RETRY_DELAY = 1
-            success = False
-
-            for attempt in range(MAX_RETRIES):
-                try:
-                    self.log_text.insert(
-                        "end",
-                        f"Attempting to stop server (attempt {attempt + 1}/{MAX_RETRIES})...\n",
-                    )
-                    app_logger.info(f"Stop attempt {attempt + 1}/{MAX_RETRIES}")
-
-                    if self.server:
-                        self.server.shutdown()
-                        success = True
-                        self.log_text.insert(
-                            "end", "Server received shutdown command\n"
-                        )
-                        app_logger.info("Server shutdown initiated")
-                        break
-
-                except Exception as e:
-                    self.log_text.insert("end", f"Shutdown error: {str(e)}\n")
-                    app_logger.error(f"Shutdown error: {str(e)}")
-                    if attempt < MAX_RETRIES - 1:
-                        time.sleep(RETRY_DELAY)
-
             self.running = False
-            self.server = None
-            self.server_process = None
-
-            port_freed = False
-            for _ in range(5):
-                with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                    if s.connect_ex(("localhost", 5000)) != 0:
-                        port_freed = True
-                        break
-                time.sleep(0.5)
-
-            self.start_button.configure(state="normal")
+            self.start_button.configure(state="disabled")
             self.stop_button.configure(state="disabled")
-            self.status_value.configure(text="Stopped", text_color="red")
-            self.progress.set(0)
-            self.open_server_button.pack_forget()
+            self._set_status("Stopping...", "orange")
+            threading.Thread(target=self._stop_server_worker, daemon=True).start()
+
+    def _stop_server_worker(self) -> None:
+        MAX_RETRIES = 3
+        RETRY_DELAY = 1
+        JOIN_TIMEOUT = 2.0
+        success = False
+        server = self.server
+        server_thread = self.server_process
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                self._log(
+                    f"Attempting to stop server (attempt {attempt + 1}/{MAX_RETRIES})...\n"
+                )
+                app_logger.info(f"Stop attempt {attempt + 1}/{MAX_RETRIES}")
 
-            status_msg = "Server stopped" if success else "Server stop failed"
-            self.log_text.insert(
-                "end", f"{status_msg} | Port {'free' if port_freed else 'busy'}\n"
-            )
-            app_logger.info(f"Final stop status: {status_msg}")
+                if server:
+                    server.shutdown()
+                    server.server_close()
+                    success = True
+                    self._log("Server received shutdown command\n")
+                    app_logger.info("Server shutdown initiated")
+                    break
 
-    def monitor_server(self) -> None:
-        import time
-        from requests.exceptions import RequestException
+            except Exception as e:
+                self._log(f"Shutdown error: {str(e)}\n")
+                app_logger.error(f"Shutdown error: {str(e)}")
+                if attempt < MAX_RETRIES - 1:
+                    time.sleep(RETRY_DELAY)
 
-        INITIAL_DELAY = 2
-        POLL_INTERVAL = 2
-        STATUS_ENDPOINT = "http://localhost:5000/api/server/status"
+        self.server = None
+        self.server_process = None
 
-        self.log_text.insert("end", "Starting server monitoring...\n")
-        app_logger.info("Starting server monitoring...")
-        time.sleep(INITIAL_DELAY)
+        if server_thread is not None:
+            server_thread.join(timeout=JOIN_TIMEOUT)
+        port_freed = server_thread is None or not server_thread.is_alive()
 
-        status_checked = False
+        if self.is_quitting:
+            return
 
-        while self.running and not status_checked:
-            try:
-                response = requests.get(
-                    STATUS_ENDPOINT, timeout=5, headers={"Connection": "close"}
-                )
+        self.root.after(0, self._finalize_stop_ui, success, port_freed)
 
-                if response.status_code == 200:
-                    data = response.json()
-                    status = data.get("status", "").lower()
-                    timestamp = data.get("timestamp", "N/A")
-
-                    def update_ui():
-                        self.status_value.configure(
-                            text=status.title(),
-                            text_color="#28a745" if status == "running" else "orange",
-                        )
-                        self.progress.set(1)
-
-                        if status == "running":
-                            self.open_server_button.pack(
-                                pady=5, after=self.button_frame
-                            )
-                            self.main_frame.update()
-                        else:
-                            self.open_server_button.pack_forget()
-
-                        self.log_text.insert(
-                            "end", f"Server status: {status} ({timestamp})\n"
-                        )
-                        app_logger.info(f"Server status: {status} ({timestamp})")
-                        self.log_text.see("end")
-
-                    self.root.after(0, update_ui)
-
-                    if status == "running":
-                        status_checked = True
-                        self.log_text.insert("end", "Server started successfully!\n")
-                        app_logger.info("Server started successfully!")
-
-                else:
-                    self.log_text.insert(
-                        "end", f"Invalid response: {response.status_code}\n"
-                    )
-                    app_logger.error(f"Invalid response: {response.status_code}")
-
-            except RequestException as e:
-                self.log_text.insert("end", f"Connection error: {str(e)}\n")
-                app_logger.error(f"Connection error: {str(e)}")
+    def _finalize_stop_ui(self, success: bool, port_freed: bool) -> None:
+        self.start_button.configure(state="normal")
+        self.stop_button.configure(state="disabled")
+        self._set_status("Stopped", "red")
+        self.progress.set(0)
+        self.open_server_button.pack_forget()
 
-            except Exception as e:
-                self.log_text.insert("end", f"Critical error: {str(e)}\n")
-                app_logger.error(f"Critical error: {str(e)}")
-                self.stop_server()
-                break
+        status_msg = "Server stopped" if success else "Server stop failed"
+        self._log(f"{status_msg} | Port {'free' if port_freed else 'busy'}\n")
+        app_logger.info(f"Final stop status: {status_msg}")
 
-            time.sleep(POLL_INTERVAL)
+    def _mark_running_ui(self, server: Any) -> None:
+        if not self.running or self.server is not server:
+            return
 
-        if not status_checked and self.running:
-            self.log_text.insert("end", "Failed to verify server status\n")
-            app_logger.error("Failed to verify server status")
-            self.stop_server()
+        self._set_status("Running", "#28a745")
+        self.progress.set(1)
+        self.open_server_button.pack(pady=5, after=self.button_frame)
+        self._log("Server started successfully!\n")
+        app_logger.info("Server started successfully!")
 
     def minimize_to_tray(self) -> None:
         if not self.is_in_tray:
             self.root.withdraw()
             try:
-                self.tray_icon = None
-                menu = (
-                    pystray.MenuItem("Show", self.show_window),
-                    pystray.MenuItem("Exit", self.quit_application),
-                )
-                self.tray_icon = pystray.Icon(
-                    "server_control", self.icon_image, "Server Control", menu
-                )
+                self.tray_icon.visible = True
                 self.is_in_tray = True
-                self.tray_icon.run()
             except Exception as e:
-                self.log_text.insert("end", f"Tray error: {str(e)}\n")
+                self._log(f"Tray error: {str(e)}\n")
                 app_logger.error(f"Tray error: {str(e)}")
                 self.root.deiconify()
                 self.is_in_tray = False
 
     def show_window(self, icon: Any = None, item: Any = None) -> None:
-        if icon:
-            icon.stop()
+        self.tray_icon.visible = False
         self.is_in_tray = False
         self.root.after(
             0,
@@ -415,19 +370,48 @@ class ServerControlGUI:
         )
 
     def quit_application(self, icon: Any = None, item: Any = None) -> None:
+        if self.is_quitting:
+            return
+        self.is_quitting = True
+
+        QUIT_TIMEOUT = 2.0
+        stop_thread = None
+
         if self.running:
-            self.stop_server()
-        if icon:
-            icon.stop()
+            self.running = False
+            stop_thread = threading.Thread(target=self._stop_server_worker, daemon=True)
+            stop_thread.start()
+
+        self.tray_icon.visible = False
         self.is_in_tray = False
-        self.root.after(0, self.root.destroy)
+        self.root.after(0, self.root.withdraw)
+        self.root.after(
+            0, self._destroy_when_stopped, stop_thread, time.monotonic() + QUIT_TIMEOUT
+        )
+
+    def _destroy_when_stopped(
+        self, stop_thread: Optional[threading.Thread], deadline: float
+    ) -> None:
+        if (
+            stop_thread is not None
+            and stop_thread.is_alive()
+            and time.monotonic() < deadline
+        ):
+            self.root.after(50, self._destroy_when_stopped, stop_thread, deadline)
+            return
+
+        self.root.destroy()
 
     def run(self) -> None:
-        self.root.mainloop()
+        self._drain_log()
+        try:
+            self.root.mainloop()
+        finally:
+            self.tray_icon.stop()
 
     def start_server_thread(self) -> None:
         if self.running:
-            self.log_text.insert("end", "Server is already running\n")
+            self._log("Server is already running\n")
             app_logger.warning("Server is already running")
             return
 
@@ -450,11 +434,13 @@ class ServerControlGUI:
                     from werkzeug.serving import make_server
                 except ImportError:
                     app_logger.error("Werkzeug not installed")
-                    self.log_text.insert("end", "Werkzeug not installed\n")
+                    self._log("Werkzeug not installed\n")
                     raise
 
-                self.server = make_server("localhost", 5000, app)
-                self.server.serve_forever()
+                server = make_server("localhost", 5000, app)
+                self.server = server
+                self.root.after(0, self._mark_running_ui, server)
+                server.serve_forever()
             except Exception as e:
                 app_logger.critical(f"Server startup failed: {str(e)}", exc_info=True)
                 self.root.after(0, self.stop_server)
@@ -467,11 +453,7 @@ class ServerControlGUI:
         self.running = True
         self.start_button.configure(state="disabled")
         self.stop_button.configure(state="normal")
-        self.status_value.configure(text="Starting...", text_color="orange")
-
-        self.status_check_thread = threading.Thread(target=self.monitor_server)
-        self.status_check_thread.daemon = True
-        self.status_check_thread.start()
+        self._set_status("Starting...", "orange")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,103 @@
+import sys
+
+sys.dont_write_bytecode = True
+
+import json
+import os
+from pathlib import Path
+
+parent_dir = str(Path(__file__).parent.parent)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from app import BotController, MMAP_THRESHOLD, freeze_config, read_json
+
+VALID_CONFIG = {
+    "username": "user",
+    "password": "secret",
+    "product_codes": ["0101", "0201"],
+    "countries": ["France"],
+    "action_delay": 0.5,
+    "page_timeout": 5,
+    "retry_count": 3,
+    "download_timeout": 30,
+    "captcha_timeout": 60,
+    "freeze_header": True,
+    "parse_all_pages": False,
+    "quantity_unit": "Kilograms",
+    "parse_depth": "level1",
+    "workers": 2,
+}
+
+
+def make_controller(tmp_path, config) -> BotController:
+    controller = BotController()
+    controller.config_path = tmp_path / "config.json"
+    controller.config_path.write_text(json.dumps(config), encoding="utf-8")
+    return controller
+
+
+def test_load_config_falls_back_per_field(tmp_path) -> None:
+    controller = make_controller(
+        tmp_path,
+        {**VALID_CONFIG, "action_delay": 0.01, "page_timeout": 0, "workers": 0},
+    )
+
+    config = controller.load_config()
+    assert config["action_delay"] == 0.5
+    assert config["page_timeout"] == 5
+    assert config["workers"] == 1
+    assert config["username"] == "user"
+    assert config["countries"] == ["France"]
+
+    saved = json.loads(controller.config_path.read_text(encoding="utf-8"))
+    assert saved["action_delay"] == 0.5
+    assert saved["page_timeout"] == 5
+
+
+def test_load_config_reuses_cache_until_file_changes(tmp_path) -> None:
+    controller = make_controller(tmp_path, VALID_CONFIG)
+    loaded = controller.load_config()
+    assert loaded["username"] == "user"
+
+    loaded["username"] = "changed"
+    assert controller.load_config()["username"] == "user"
+
+    stat = controller.config_path.stat()
+    controller.config_path.write_text(
+        json.dumps({**VALID_CONFIG, "username": "resu"}), encoding="utf-8"
+    )
+    os.utime(controller.config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert controller.load_config()["username"] == "user"
+
+    controller.config_path.write_text(
+        json.dumps({**VALID_CONFIG, "username": "other"}), encoding="utf-8"
+    )
+    assert controller.load_config()["username"] == "other"
+
+
+def test_read_json_small_and_mapped(tmp_path) -> None:
+    small = tmp_path / "small.json"
+    small.write_text(json.dumps(VALID_CONFIG), encoding="utf-8")
+    assert read_json(small, small.stat().st_size) == VALID_CONFIG
+
+    large_config = {**VALID_CONFIG, "countries": ["France"] * 1000}
+    large = tmp_path / "large.json"
+    large.write_text(json.dumps(large_config), encoding="utf-8")
+    assert large.stat().st_size >= MMAP_THRESHOLD
+    assert read_json(large, large.stat().st_size) == large_config
+
+
+def test_load_config_creates_missing_file(tmp_path) -> None:
+    controller = BotController()
+    controller.config_path = tmp_path / "config.json"
+
+    config = controller.load_config()
+    saved = json.loads(controller.config_path.read_text(encoding="utf-8"))
+    assert saved == config
+    assert saved["action_delay"] == 0.5
+
+
+def test_freeze_config_turns_lists_into_tuples() -> None:
+    frozen = freeze_config({"countries": ["France"], "page_timeout": 5})
+    assert frozen == {"countries": ("France",), "page_timeout": 5}
@@ -2,7 +2,6 @@ import sys
 
 sys.dont_write_bytecode = True
 
-import sys
 from pathlib import Path
 from threading import Event
 
@@ -0,0 +1,253 @@
+import sys
+
+sys.dont_write_bytecode = True
+
+import io
+import os
+from pathlib import Path
+from threading import Event, Lock, Thread
+
+import pytest
+
+parent_dir = str(Path(__file__).parent.parent)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from bot import core
+
+
+SAMPLE_PAGE_1 = (
+    "Exporters\t2024-M01, Tons\t2024-M02, Tons\tTotal, Tons\n"
+    "World\t1,234\t(5)\t1229\n"
+    "  \t \t\n"
+    "\n"
+    "France\t2.5\t-\t2.5\n"
+    "Spain\t0.0015\t1.2.3\tx\n"
+    "Italy\tn/a\t0\t0\n"
+)
+
+SAMPLE_PAGE_2 = (
+    "Exporters\t2024-M01, Tons\t2024-M03, Tons\n"
+    "France\t0\t7\n"
+    "Italy\t3\t-\n"
+)
+
+
+def parse_page(text: str, target_factor: float = 1.0):
+    return core._parse_export_rows(io.StringIO(text), target_factor, lambda: False)
+
+
+def test_parse_export_rows_matches_baseline_conversion() -> None:
+    headers, rows = parse_page(SAMPLE_PAGE_1)
+
+    assert headers == ["Exporters", "2024-M01", "2024-M02"]
+    assert rows == [
+        {"Exporters": "World", "2024-M01": 1234000, "2024-M02": -5000},
+        {"Exporters": "France", "2024-M01": 2500, "2024-M02": None},
+        {"Exporters": "Spain", "2024-M01": 1.5, "2024-M02": "1.2.3"},
+        {"Exporters": "Italy", "2024-M01": "n/a", "2024-M02": 0},
+    ]
+
+
+def test_parse_export_rows_keeps_values_in_target_unit() -> None:
+    _, rows = parse_page(SAMPLE_PAGE_1, target_factor=1000.0)
+
+    assert rows[0] == {"Exporters": "World", "2024-M01": 1234, "2024-M02": -5}
+    assert rows[1] == {"Exporters": "France", "2024-M01": 2.5, "2024-M02": None}
+    assert rows[2]["2024-M01"] == 0.0015
+
+
+def test_parse_export_rows_rejects_header_without_unit() -> None:
+    with pytest.raises(ValueError):
+        parse_page("Exporters\t2024-M01, Liters\nFrance\t1\n")
+
+
+def test_parse_export_rows_stops_on_request() -> None:
+    stopped = core._parse_export_rows(io.StringIO(SAMPLE_PAGE_1), 1.0, lambda: True)
+    assert stopped is None
+
+
+def test_merge_exporter_rows_matches_baseline() -> None:
+    exporters_data = {}
+    for page in (SAMPLE_PAGE_1, SAMPLE_PAGE_2):
+        core._merge_exporter_rows(exporters_data, parse_page(page)[1])
+
+    assert exporters_data == {
+        "World": {"Exporters": "World", "2024-M01": 1234000, "2024-M02": -5000},
+        "France": {
+            "Exporters": "France",
+            "2024-M01": 2500,
+            "2024-M02": None,
+            "2024-M03": 7000,
+        },
+        "Spain": {"Exporters": "Spain", "2024-M01": 1.5, "2024-M02": "1.2.3"},
+        "Italy": {"Exporters": "Italy", "2024-M01": 3000, "2024-M02": 0},
+    }
+
+
+def test_txt_names(tmp_path) -> None:
+    (tmp_path / "a.txt").write_text("")
+    (tmp_path / "b.xlsx").write_text("")
+    assert core._txt_names(str(tmp_path)) == {"a.txt"}
+
+
+def test_xpath_literal_quotes() -> None:
+    assert core._xpath_literal("Kilograms") == '"Kilograms"'
+    assert core._xpath_literal('say "hi"') == "'say \"hi\"'"
+    assert core._xpath_literal("it's \"x\"") == (
+        "concat(\"it's \", '\"', \"x\", '\"', \"\")"
+    )
+
+
+def test_prune_empty_removes_only_empty_dirs(tmp_path) -> None:
+    (tmp_path / "01" / "0101").mkdir(parents=True)
+    (tmp_path / "01" / "0102").mkdir()
+    (tmp_path / "01" / "0102" / "France.xlsx").write_bytes(b"")
+
+    assert core._prune_empty(str(tmp_path / "01")) is False
+    assert not (tmp_path / "01" / "0101").exists()
+    assert (tmp_path / "01" / "0102" / "France.xlsx").exists()
+    assert core._prune_empty(str(tmp_path / "missing")) is False
+
+
+def test_run_session_creates_download_dir(tmp_path, monkeypatch) -> None:
+    download_dir = tmp_path / "downloads" / "worker_1"
+    seen = []
+
+    def fake_get_driver(directory: str, headless: bool) -> object:
+        seen.append(os.path.isdir(directory))
+        return object()
+
+    monkeypatch.setattr(core, "_get_driver", fake_get_driver)
+    monkeypatch.setattr(core, "_sign_in", lambda driver, config, stop_event: False)
+    monkeypatch.setattr(core, "_release_driver", lambda *args: None)
+
+    config = {"download_dir": str(download_dir), "headless": True}
+    assert core._run_session(config, Event(), ["01"], str(tmp_path)) is False
+    assert seen == [True]
+
+
+def test_split_by_chapter_keeps_each_chapter_in_one_batch() -> None:
+    codes = ["0101", "0201", "0102", "03", "020110", "0104", "04"]
+    batches = core._split_by_chapter(codes, 3)
+
+    assert len(batches) == 3
+    assert sorted(code for batch in batches for code in batch) == sorted(codes)
+    owners = {}
+    for index, batch in enumerate(batches):
+        for code in batch:
+            assert owners.setdefault(code[:2], index) == index
+
+
+def test_split_by_chapter_caps_workers_by_chapters() -> None:
+    assert core._split_by_chapter(["0101", "0102"], 4) == [["0101", "0102"]]
+    assert core._split_by_chapter([], 2) == []
+
+
+def test_login_partitions_sessions_by_chapter(tmp_path, monkeypatch) -> None:
+    sessions = []
+    lock = Lock()
+
+    def fake_run_session(config, stop_event, product_codes, results_base_dir):
+        with lock:
+            sessions.append((config["download_dir"], list(product_codes)))
+        return True
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(core, "check_chrome_installed", lambda: True)
+    monkeypatch.setattr(core, "_run_session", fake_run_session)
+
+    config = {"product_codes": ["0101", "0201", "0102", "0202"], "workers": 4}
+    assert core.login_to_trademap(config, Event()) is True
+
+    assert len(sessions) == 2
+    assert len({directory for directory, _ in sessions}) == 2
+    assert sorted({code[:2] for code in codes} for _, codes in sessions) == [
+        {"01"},
+        {"02"},
+    ]
+
+
+def test_captcha_state_is_per_session() -> None:
+    other_ready = Event()
+    release = Event()
+
+    def other_session() -> None:
+        core.CAPTCHA_STATE.set("other")
+        other_ready.set()
+        release.wait(5)
+        core.CAPTCHA_STATE.clear()
+
+    thread = Thread(target=other_session)
+    thread.start()
+    other_ready.wait(5)
+
+    core.CAPTCHA_STATE.set("mine")
+    core.CAPTCHA_STATE.clear()
+    assert core.CAPTCHA_STATE.snapshot == (True, "other")
+
+    release.set()
+    thread.join(5)
+    assert core.CAPTCHA_STATE.snapshot == (False, None)
+
+
+class FakeDriver:
+    def __init__(self) -> None:
+        self.session_id = "session"
+        self.current_url = "https://www.trademap.org/Index.aspx"
+        self.calls = []
+
+    def execute_script(self, script: str) -> None:
+        self.calls.append("script")
+
+    def execute_cdp_cmd(self, command: str, params: dict) -> None:
+        self.calls.append(command)
+
+    def get(self, url: str) -> None:
+        self.calls.append(url)
+        self.current_url = url
+
+    def quit(self) -> None:
+        self.calls.append("quit")
+
+
+def test_headless_driver_is_reset_and_reused(monkeypatch) -> None:
+    created = []
+
+    def fake_create_driver(download_dir: str, headless: bool) -> FakeDriver:
+        created.append(FakeDriver())
+        return created[-1]
+
+    monkeypatch.setattr(core, "IDLE_DRIVERS", {})
+    monkeypatch.setattr(core, "_create_driver", fake_create_driver)
+
+    for _ in range(2):
+        driver = core._get_driver("downloads", True)
+        core._release_driver("downloads", True, driver)
+
+    assert len(created) == 1
+    assert created[0].calls == [
+        "script",
+        "Network.clearBrowserCookies",
+        "about:blank",
+    ] * 2
+    assert core.IDLE_DRIVERS == {("downloads", True): created[0]}
+
+
+def test_visible_driver_is_quit_after_each_run(monkeypatch) -> None:
+    created = []
+
+    def fake_create_driver(download_dir: str, headless: bool) -> FakeDriver:
+        created.append(FakeDriver())
+        return created[-1]
+
+    monkeypatch.setattr(core, "IDLE_DRIVERS", {})
+    monkeypatch.setattr(core, "_create_driver", fake_create_driver)
+
+    for _ in range(2):
+        driver = core._get_driver("downloads", False)
+        core._release_driver("downloads", False, driver)
+
+    assert len(created) == 2
+    assert [driver.calls for driver in created] == [["quit"], ["quit"]]
+    assert core.IDLE_DRIVERS == {}